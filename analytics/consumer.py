@@ -1,14 +1,9 @@
-import json
 import logging
 import os
-from datetime import datetime, timezone
+import threading
 
 import django
-from kafka import KafkaConsumer
-from kafka.errors import KafkaError
-
-from analytics.models import PlanetEvent
-from cache.cache_manager import CacheManager
+from kafka import ConsumerRebalanceListener, KafkaConsumer
 
 # ───────────────────────────────────────────────────────────────────────────────
 # 1) Bootstrap Django before importing any models
@@ -16,49 +11,113 @@ from cache.cache_manager import CacheManager
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 django.setup()
 
+from analytics.pipeline import (  # noqa: E402
+    ConsumerPipeline,
+    decode_messages,
+    persist_events,
+)
+from cache.cache_manager import CacheManager  # noqa: E402
+
 
 # 📝 Setup logging
 logger = logging.getLogger(__name__)
 
+# 📦 Batching: each poll returns at most BATCH_SIZE events and waits at most
+# FLUSH_INTERVAL_MS; the persist stage coalesces queued polls up to
+# BATCH_SIZE per insert. PIPELINE_QUEUE_SIZE bounds the batches waiting in
+# front of each stage; a full persist queue pauses the partitions.
+ANALYTICS_CONSUMER_BATCH_SIZE = int(os.getenv("ANALYTICS_CONSUMER_BATCH_SIZE", "500"))
+ANALYTICS_CONSUMER_FLUSH_INTERVAL_MS = int(
+    os.getenv("ANALYTICS_CONSUMER_FLUSH_INTERVAL_MS", "1000")
+)
+ANALYTICS_PIPELINE_QUEUE_SIZE = int(os.getenv("ANALYTICS_PIPELINE_QUEUE_SIZE", "8"))
+# ⏳ Pause before retrying a batch that failed to persist
+ANALYTICS_CONSUMER_RETRY_BACKOFF = float(
+    os.getenv("ANALYTICS_CONSUMER_RETRY_BACKOFF", "1")
+)
+
+ANALYTICS_TOPIC = "planet_events"
+ANALYTICS_GROUP_ID = "analytics-consumer"
+
 
-def run_consumer():
-    # 🔌 Initialize Kafka consumer with configuration
+def build_consumer(listener: ConsumerRebalanceListener = None) -> KafkaConsumer:
+    """🔌 Group member with manual offset commits, optionally rebalance-aware."""
     consumer = KafkaConsumer(
-        "planet_events",
         bootstrap_servers=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092").split(","),
-        value_deserializer=lambda m: json.loads(m.decode("utf-8")),
         auto_offset_reset="earliest",
-        enable_auto_commit=True,
-        group_id="analytics-consumer",
+        enable_auto_commit=False,
+        max_poll_records=ANALYTICS_CONSUMER_BATCH_SIZE,
+        group_id=ANALYTICS_GROUP_ID,
     )
+    consumer.subscribe([ANALYTICS_TOPIC], listener=listener)
+    return consumer
+
+
+def process_batch(messages: list) -> int:
+    """
+    💾 Single-threaded path: decode, persist and count one batch of
+    messages. The counters are only bumped once the insert has committed,
+    and only for events that were not duplicates. Returns the number of
+    events stored.
+    """
+    batch = decode_messages(messages)
+    day_counts = persist_events(batch.events, batch.days)
+    CacheManager.incr_event_counts(day_counts)
+    stored = sum(day_counts.values())
+    logger.info("✅ Consumed event batch", extra={"events": stored})
+    return stored
 
-    logger.info("🔍 Starting analytics consumer…")
-    # 🔄 Main consumer loop
-    for msg in consumer:
-        try:
-            # 📥 Get event data from message
-            evt = msg.value or {}
-
-            # 💾 Step 1: Store raw event data in database for audit
-            PlanetEvent.objects.create(
-                event_type=evt.get("type", ""),
-                data=evt.get("data", {}),
-            )
 
-            # 📊 Step 2: Increment counter in Redis for event date
-            ts_ms = msg.timestamp or 0  # epoch ms
-            day = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime(
-                "%Y-%m-%d"
+class CommitOnRevoke(ConsumerRebalanceListener):
+    """
+    ⚖️ Before partitions move to another group member, let the pipeline
+    persist what it already read and commit it, so the new owner neither
+    re-reads nor skips those events.
+    """
+
+    def __init__(self):
+        self.pipeline = None
+
+    def on_partitions_revoked(self, revoked):
+        if self.pipeline is not None and revoked:
+            logger.info(
+                "⚖️ Partitions revoked; committing in-flight batches",
+                extra={"partitions": [tp.partition for tp in revoked]},
             )
-            CacheManager._incr_event_count_for_day(day)
+            # Batches still in flight after the drain timeout are persisted
+            # but never committed: commit_done skips partitions we no longer
+            # own, and the new owner re-reads them (event ids dedup them)
+            self.pipeline.drain()
+
+    def on_partitions_assigned(self, assigned):
+        logger.info(
+            "⚖️ Partitions assigned",
+            extra={"partitions": [tp.partition for tp in assigned]},
+        )
 
-            # ✅ Log successful event processing
-            logger.info("✅ Consumed event", extra={"event": evt})
-        except (KafkaError, Exception) as e:
-            # ❌ Log any errors that occur
-            logger.error("❌ Error in consumer loop", exc_info=e)
+
+def run_consumer(consumer=None, stop_event: threading.Event = None):
+    """🚀 Run one pipelined consumer until `stop_event` is set."""
+    stop_event = stop_event or threading.Event()
+    listener = None
+    if consumer is None:
+        listener = CommitOnRevoke()
+        consumer = build_consumer(listener)
+    pipeline = ConsumerPipeline(
+        consumer,
+        stop_event,
+        batch_size=ANALYTICS_CONSUMER_BATCH_SIZE,
+        poll_timeout_ms=ANALYTICS_CONSUMER_FLUSH_INTERVAL_MS,
+        queue_size=ANALYTICS_PIPELINE_QUEUE_SIZE,
+        retry_backoff=ANALYTICS_CONSUMER_RETRY_BACKOFF,
+    )
+    if listener is not None:
+        listener.pipeline = pipeline
+    pipeline.run()
 
 
 # 🚀 Only run the consumer when executed as a script
 if __name__ == "__main__":
-    run_consumer()
+    from analytics.supervisor import main
+
+    main()
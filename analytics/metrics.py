@@ -0,0 +1,38 @@
+# 📈 metrics.py - Prometheus metrics for the analytics consumer pipeline
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# 🏭 Per-stage throughput and timing (stage = decode | persist | aggregate)
+stage_events_counter = Counter(
+    "analytics_pipeline_events_total",
+    "Events that left a pipeline stage",
+    ["stage"],
+)
+stage_seconds_histogram = Histogram(
+    "analytics_pipeline_stage_seconds",
+    "Time a pipeline stage spent on one batch",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+stage_errors_counter = Counter(
+    "analytics_pipeline_errors_total",
+    "Batches a pipeline stage failed to process",
+    ["stage"],
+)
+
+# ♻️ Events dropped because their event_id was already stored
+duplicate_events_counter = Counter(
+    "analytics_duplicate_events_total",
+    "Consumed events skipped as duplicates of an already stored event_id",
+)
+
+# 🚦 Backpressure
+queue_depth_gauge = Gauge(
+    "analytics_pipeline_queue_depth",
+    "Batches waiting in front of a pipeline stage",
+    ["queue"],
+)
+consumer_paused_gauge = Gauge(
+    "analytics_consumer_paused",
+    "1 while partitions are paused because the persist stage is behind",
+)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_alter_planetevent_consumed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="planetevent",
+            name="event_id",
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
@@ -10,11 +10,14 @@ class PlanetEvent(models.Model):
     • event_type: type of the event consumed.
     • data: event payload as JSON.
     • consumed_at: timestamp when the event was processed.
+    • event_id: producer-assigned id; unique so replays are not stored twice
+      (null for events published before ids existed).
     """
 
     event_type = models.CharField(max_length=50)
     data = models.JSONField()
     consumed_at = models.DateTimeField(default=timezone.now)
+    event_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     def __str__(self):
         """
@@ -0,0 +1,426 @@
+# 🏭 pipeline.py - Staged analytics consumer: decode → persist → aggregate
+#
+# The poll thread owns the KafkaConsumer (it is not thread-safe): it polls,
+# hands batches to the stage threads through bounded queues, commits the
+# offsets of persisted batches and pauses partitions when the database
+# stage falls behind.
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+from django.db import connections, router, transaction
+from kafka import TopicPartition
+from kafka.structs import OffsetAndMetadata
+
+from analytics.metrics import (
+    consumer_paused_gauge,
+    duplicate_events_counter,
+    queue_depth_gauge,
+    stage_errors_counter,
+    stage_events_counter,
+    stage_seconds_histogram,
+)
+from analytics.models import PlanetEvent
+from cache.cache_manager import CacheManager
+from utils.event_codecs import decode_event
+
+# 📝 Setup logging
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# 📦 A decoded batch: model instances, the UTC day of each one and the
+# offsets to commit ({TopicPartition: next offset}) once it is persisted
+Batch = namedtuple("Batch", ["events", "days", "offsets"])
+
+
+# -------------------------------------------------------------------
+# 🧩 Stage helpers (also used by the single-threaded process_batch)
+# -------------------------------------------------------------------
+
+
+def event_day(msg) -> str:
+    """UTC day ('YYYY-MM-DD') of the Kafka message timestamp."""
+    ts_ms = msg.timestamp or 0  # epoch ms
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _event_id(value):
+    """Parse a producer event id; anything that is not a UUID is ignored."""
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+def decode_messages(messages: list) -> Batch:
+    """
+    📥 Decode messages with the codec named in their headers. Messages that
+    cannot be decoded are logged and skipped so one bad record cannot
+    block the partition; their offsets are still committed.
+    """
+    events, days, offsets = [], [], {}
+    for msg in messages:
+        offsets[TopicPartition(msg.topic, msg.partition)] = msg.offset + 1
+        try:
+            evt = decode_event(msg.value, msg.headers) if msg.value else {}
+        except Exception as e:
+            logger.error(
+                "❌ Undecodable event skipped",
+                extra={"partition": msg.partition, "offset": msg.offset},
+                exc_info=e,
+            )
+            continue
+        events.append(
+            PlanetEvent(
+                event_type=evt.get("type", ""),
+                data=evt.get("data", {}),
+                event_id=_event_id(evt.get("event_id")),
+            )
+        )
+        days.append(event_day(msg))
+    return Batch(events, days, offsets)
+
+
+def _insert_new_ids(events: list) -> set:
+    """
+    INSERT … ON CONFLICT (event_id) DO NOTHING RETURNING event_id: the
+    database reports exactly which ids it stored, even when another
+    consumer inserts the same id concurrently.
+    """
+    connection = connections[router.db_for_write(PlanetEvent)]
+    meta = PlanetEvent._meta
+    fields = [f for f in meta.concrete_fields if not f.primary_key]
+    id_field = meta.get_field("event_id")
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(f.column) for f in fields)
+    row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    size = connection.ops.bulk_batch_size(fields, events) or len(events)
+
+    inserted = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(events), size):
+            chunk = events[start : start + size]
+            cursor.execute(
+                f"INSERT INTO {qn(meta.db_table)} ({columns}) "
+                f"VALUES {', '.join([row] * len(chunk))} "
+                f"ON CONFLICT ({qn(id_field.column)}) DO NOTHING "
+                f"RETURNING {qn(id_field.column)}",
+                [
+                    f.get_db_prep_save(f.pre_save(event, True), connection)
+                    for event in chunk
+                    for f in fields
+                ],
+            )
+            inserted.update(id_field.to_python(v) for (v,) in cursor.fetchall())
+    return inserted
+
+
+def _insert_unseen_ids(events: list) -> set:
+    """Fallback for backends without RETURNING: skip ids already stored."""
+    ids = [e.event_id for e in events]
+    seen = set(
+        PlanetEvent.objects.filter(event_id__in=ids).values_list("event_id", flat=True)
+    )
+    new_events = [e for e in events if e.event_id not in seen]
+    PlanetEvent.objects.bulk_create(new_events, ignore_conflicts=True)
+    return {e.event_id for e in new_events}
+
+
+def persist_events(events: list, days: list) -> Counter:
+    """
+    💾 Store a batch in a single transaction, skipping events whose
+    event_id is already stored (replays, producer retries) or repeated
+    within the batch. Returns per-day counts of the rows that were actually
+    inserted, so counters are never bumped twice.
+    """
+    if not events:
+        return Counter()
+
+    day_counts = Counter()
+    without_id, by_id = [], {}
+    for event, day in zip(events, days):
+        if event.event_id is None:
+            # Events from before ids existed cannot conflict
+            without_id.append(event)
+            day_counts[day] += 1
+        elif event.event_id not in by_id:
+            by_id[event.event_id] = (event, day)
+
+    with transaction.atomic():
+        if without_id:
+            PlanetEvent.objects.bulk_create(without_id)
+        if by_id:
+            with_id = [event for event, _ in by_id.values()]
+            connection = connections[router.db_for_write(PlanetEvent)]
+            if connection.features.can_return_rows_from_bulk_insert:
+                inserted = _insert_new_ids(with_id)
+            else:
+                inserted = _insert_unseen_ids(with_id)
+            for event_id in inserted:
+                day_counts[by_id[event_id][1]] += 1
+
+    duplicates = len(events) - sum(day_counts.values())
+    if duplicates:
+        duplicate_events_counter.inc(duplicates)
+    return day_counts
+
+
+def _merge(batches: list) -> Batch:
+    events, days, offsets = [], [], {}
+    for batch in batches:
+        events.extend(batch.events)
+        days.extend(batch.days)
+        offsets.update(batch.offsets)
+    return Batch(events, days, offsets)
+
+
+def _offset_and_metadata(offset: int) -> OffsetAndMetadata:
+    # kafka-python 2.1 added leader_epoch to OffsetAndMetadata
+    if "leader_epoch" in OffsetAndMetadata._fields:
+        return OffsetAndMetadata(offset, "", -1)
+    return OffsetAndMetadata(offset, "")
+
+
+class _Timed:
+    """Context manager recording one stage's duration and event count."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.events = 0
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_seconds_histogram.labels(stage=self.stage).observe(
+            time.monotonic() - self.started
+        )
+        if exc_type is None:
+            stage_events_counter.labels(stage=self.stage).inc(self.events)
+        return False
+
+
+# -------------------------------------------------------------------
+# 🏭 Pipeline
+# -------------------------------------------------------------------
+
+
+class ConsumerPipeline:
+    """
+    🏭 Runs decode, persist and aggregate on separate threads:
+    • decode: raw messages → PlanetEvent instances + per-day counts.
+    • persist: coalesces queued batches into one bulk insert and retries
+      it until it succeeds, so a database outage stalls the pipeline
+      instead of skipping events.
+    • aggregate: bumps the Redis day counters concurrently with the next
+      insert.
+    Offsets are committed by the poll thread once a batch is persisted.
+    When the persist queue fills up, all assigned partitions are paused
+    until it drains to half.
+    """
+
+    def __init__(
+        self,
+        consumer,
+        stop_event: threading.Event,
+        batch_size: int,
+        poll_timeout_ms: int,
+        queue_size: int = 8,
+        retry_backoff: float = 1.0,
+        drain_timeout: float = 30.0,
+    ):
+        self.consumer = consumer
+        self.stop_event = stop_event
+        self.batch_size = batch_size
+        self.poll_timeout_ms = poll_timeout_ms
+        self.retry_backoff = retry_backoff
+        self.drain_timeout = drain_timeout
+
+        self.decode_q = queue.Queue(maxsize=queue_size)
+        self.persist_q = queue.Queue(maxsize=queue_size)
+        self.aggregate_q = queue.Queue(maxsize=queue_size)
+        self.done_q = queue.Queue()
+        self.paused = False
+
+        self._inflight = 0
+        self._inflight_cond = threading.Condition()
+        self._abandon = threading.Event()
+        # Partitions with an abandoned batch: nothing after the gap may be
+        # committed, or those events would be skipped on the next start
+        self._gaps = set()
+        self._threads = [
+            threading.Thread(target=target, name=f"analytics-{name}", daemon=True)
+            for name, target in (
+                ("decode", self._decode_loop),
+                ("persist", self._persist_loop),
+                ("aggregate", self._aggregate_loop),
+            )
+        ]
+
+    # ---------------------------------------------------------------
+    # 🧵 Stage threads
+    # ---------------------------------------------------------------
+
+    def _decode_loop(self) -> None:
+        while True:
+            messages = self.decode_q.get()
+            if messages is _STOP:
+                self.persist_q.put(_STOP)
+                return
+            with _Timed("decode") as timed:
+                batch = decode_messages(messages)
+                timed.events = len(batch.events)
+            self.persist_q.put(batch)
+
+    def _persist_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self.persist_q.get()
+            if first is _STOP:
+                break
+            # Coalesce whatever else is already waiting into one insert
+            batches = [first]
+            while sum(len(b.events) for b in batches) < self.batch_size:
+                try:
+                    nxt = self.persist_q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batches.append(nxt)
+
+            batch = _merge(batches)
+            day_counts = self._persist_with_retry(batch)
+            if day_counts is None:
+                self._gaps.update(batch.offsets)
+            else:
+                self.aggregate_q.put(day_counts)
+                self.done_q.put(
+                    {tp: o for tp, o in batch.offsets.items() if tp not in self._gaps}
+                )
+            self._finish(len(batches))
+        self.aggregate_q.put(_STOP)
+
+    def _persist_with_retry(self, batch: Batch):
+        """Inserted per-day counts, or None if the batch was abandoned."""
+        while True:
+            try:
+                with _Timed("persist") as timed:
+                    day_counts = persist_events(batch.events, batch.days)
+                    timed.events = sum(day_counts.values())
+                return day_counts
+            except Exception as e:
+                stage_errors_counter.labels(stage="persist").inc()
+                logger.error("❌ Error in consumer loop", exc_info=e)
+                if self._abandon.is_set() or self.stop_event.is_set():
+                    # Left uncommitted: replayed after the next start
+                    return None
+                time.sleep(self.retry_backoff)
+
+    def _aggregate_loop(self) -> None:
+        while True:
+            day_counts = self.aggregate_q.get()
+            if day_counts is _STOP:
+                return
+            try:
+                with _Timed("aggregate") as timed:
+                    CacheManager.incr_event_counts(day_counts)
+                    timed.events = sum(day_counts.values())
+            except Exception as e:
+                # Counters are a cache: the database rows are already stored
+                stage_errors_counter.labels(stage="aggregate").inc()
+                logger.error("❌ Failed to update event counters", exc_info=e)
+
+    # ---------------------------------------------------------------
+    # 🔁 Poll thread
+    # ---------------------------------------------------------------
+
+    def _finish(self, batches: int) -> None:
+        with self._inflight_cond:
+            self._inflight -= batches
+            self._inflight_cond.notify_all()
+
+    def _submit(self, messages: list) -> None:
+        with self._inflight_cond:
+            self._inflight += 1
+        self.decode_q.put(messages)
+
+    def commit_done(self) -> None:
+        """
+        Commit offsets of every batch persisted so far, limited to the
+        partitions this member still owns: a batch that finishes after its
+        partition was revoked must not overwrite the new owner's progress.
+        """
+        offsets = {}
+        while True:
+            try:
+                offsets.update(self.done_q.get_nowait())
+            except queue.Empty:
+                break
+        assigned = self.consumer.assignment()
+        offsets = {tp: o for tp, o in offsets.items() if tp in assigned}
+        if offsets:
+            self.consumer.commit(
+                offsets={tp: _offset_and_metadata(o) for tp, o in offsets.items()}
+            )
+
+    def drain(self) -> bool:
+        """
+        Wait for every submitted batch to be persisted, then commit.
+        Returns False if the stages did not catch up within drain_timeout.
+        """
+        with self._inflight_cond:
+            drained = self._inflight_cond.wait_for(
+                lambda: self._inflight == 0, timeout=self.drain_timeout
+            )
+        self.commit_done()
+        return drained
+
+    def _apply_backpressure(self) -> None:
+        depth = self.persist_q.qsize()
+        queue_depth_gauge.labels(queue="decode").set(self.decode_q.qsize())
+        queue_depth_gauge.labels(queue="persist").set(depth)
+        queue_depth_gauge.labels(queue="aggregate").set(self.aggregate_q.qsize())
+
+        if not self.paused and depth >= self.persist_q.maxsize:
+            self.consumer.pause(*self.consumer.assignment())
+            self.paused = True
+            consumer_paused_gauge.set(1)
+            logger.warning("⏸️ Persist stage behind; partitions paused")
+        elif self.paused and depth <= self.persist_q.maxsize // 2:
+            self.consumer.resume(*self.consumer.paused())
+            self.paused = False
+            consumer_paused_gauge.set(0)
+            logger.info("▶️ Persist stage caught up; partitions resumed")
+
+    def run(self) -> None:
+        logger.info("🔍 Starting analytics consumer…")
+        for thread in self._threads:
+            thread.start()
+        try:
+            while not self.stop_event.is_set():
+                self.commit_done()
+                self._apply_backpressure()
+                records = self.consumer.poll(
+                    timeout_ms=self.poll_timeout_ms, max_records=self.batch_size
+                )
+                messages = [m for recs in records.values() for m in recs]
+                if messages:
+                    self._submit(messages)
+        finally:
+            # 🛑 Drain: finish and commit in-flight batches before leaving
+            if not self.drain():
+                self._abandon.set()
+            self.decode_q.put(_STOP)
+            for thread in self._threads:
+                thread.join(self.drain_timeout)
+            self.commit_done()
+            self.consumer.close()
@@ -0,0 +1,167 @@
+# 🧑‍✈️ supervisor.py - Runs N analytics consumer processes in one container
+#
+#   python -m analytics.consumer --workers 4
+#
+# Each child is an independent member of the analytics consumer group, so
+# Kafka spreads the topic's partitions across them.
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+
+from django.db import connections
+from kafka import KafkaConsumer
+
+from analytics import consumer as consumer_mod
+
+# 📝 Setup logging
+logger = logging.getLogger(__name__)
+
+# ⏳ Minimum time between two restarts of the same worker slot
+RESTART_BACKOFF = float(os.getenv("ANALYTICS_CONSUMER_RESTART_BACKOFF", "1"))
+
+
+def partition_count() -> int:
+    """Number of partitions of the analytics topic, or None if unknown."""
+    try:
+        probe = KafkaConsumer(
+            bootstrap_servers=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092").split(
+                ","
+            )
+        )
+        try:
+            partitions = probe.partitions_for_topic(consumer_mod.ANALYTICS_TOPIC)
+        finally:
+            probe.close()
+    except Exception as e:
+        logger.warning("⚠️ Could not read partition count", exc_info=e)
+        return None
+    return len(partitions) if partitions else None
+
+
+def _child_main(index: int) -> None:
+    """Body of one forked worker: consume until SIGTERM, then drain."""
+    # The parent's DB connections (if any) must not be shared across fork
+    connections.close_all()
+
+    stop_event = threading.Event()
+
+    def _stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    logger.info("🔍 Consumer worker started", extra={"worker": index})
+    consumer_mod.run_consumer(stop_event=stop_event)
+
+
+class Supervisor:
+    """
+    🧑‍✈️ Forks `workers` consumer processes and keeps them running:
+    • A child that exits while the supervisor is running is restarted.
+    • SIGTERM/SIGINT are forwarded to every child, which finishes and
+      commits its in-flight batch before exiting; the supervisor waits
+      for all of them.
+    """
+
+    def __init__(self, workers: int, spawn=None):
+        self.workers = workers
+        self.children = {}  # pid -> worker index
+        self.last_start = {}  # worker index -> monotonic start time
+        self.stopping = False
+        self._spawn_child = spawn or self._fork
+
+    def _fork(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _child_main(index)
+            except BaseException:
+                logger.exception("❌ Consumer worker crashed", extra={"worker": index})
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    def spawn(self, index: int) -> None:
+        wait = self.last_start.get(index, 0) + RESTART_BACKOFF - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_start[index] = time.monotonic()
+        pid = self._spawn_child(index)
+        self.children[pid] = index
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reap(self, pid: int, status: int) -> None:
+        index = self.children.pop(pid, None)
+        if index is None:
+            return
+        if self.stopping:
+            return
+        logger.warning(
+            "⚠️ Consumer worker exited; restarting",
+            extra={"worker": index, "pid": pid, "status": status},
+        )
+        self.spawn(index)
+
+    def run(self) -> None:
+        # Children must open their own connections
+        connections.close_all()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(self.workers):
+            self.spawn(index)
+        logger.info("🧑‍✈️ Consumer supervisor running", extra={"workers": self.workers})
+
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.reap(pid, status)
+        logger.info("🛑 Consumer supervisor stopped")
+
+
+def resolve_workers(requested: int) -> int:
+    """Workers beyond the partition count would sit idle: cap at it."""
+    partitions = partition_count()
+    if partitions and requested > partitions:
+        logger.warning(
+            "⚠️ More workers than partitions; extra workers would be idle",
+            extra={"workers": requested, "partitions": partitions},
+        )
+        return partitions
+    return requested
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the analytics consumer.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("ANALYTICS_CONSUMER_WORKERS", "1")),
+        help="Consumer processes to run (0 = one per CPU core).",
+    )
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1:
+        # Single process: no fork, but still drain on SIGTERM
+        _child_main(0)
+        return
+    Supervisor(resolve_workers(workers)).run()
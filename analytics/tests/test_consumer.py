@@ -1,9 +1,18 @@
 # 🧪 test_analytics_consumer.py - Tests for analytics.consumer
 
 import importlib
-import types
+import threading
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 
+import pytest
+from kafka import TopicPartition
+
+from analytics.models import PlanetEvent
+from utils.event_codecs import encode_event
+
+consumer_mod = importlib.import_module("analytics.consumer")
+
 # -------------------------------------------------------------------
 # 🛠️ Dummy utilities / stubs for KafkaConsumer tests
 # -------------------------------------------------------------------
@@ -21,101 +30,123 @@ def _ts_ms(days_offset: int) -> int:
 
 
 class _DummyMsg:
-    """Kafka message stub with `value` and `timestamp` fields."""
+    """Kafka message stub with encoded `value`, `headers` and `timestamp`."""
 
-    def __init__(self, value, ts_ms):
-        self.value = value
+    def __init__(self, value, ts_ms, codec="json", partition=0, offset=0):
+        self.value, self.headers = encode_event(value, codec)
         self.timestamp = ts_ms
+        self.topic = "planet_events"
+        self.partition = partition
+        self.offset = offset
 
 
 class _DummyKafkaConsumer:
     """
-    In-memory KafkaConsumer substitute for controlled iteration.
+    In-memory KafkaConsumer substitute: each poll() hands out the next
+    scripted batch, then sets the stop event once the script is exhausted.
     """
 
-    def __init__(self, *args, **kwargs):
-        self._msgs = [
-            _DummyMsg({"type": "created", "data": {"id": 1}}, _ts_ms(-2)),
-            _DummyMsg({"type": "deleted", "data": {"id": 99}}, _ts_ms(-1)),
-        ]
+    def __init__(self, polls, stop_event):
+        self._polls = list(polls)
+        self._stop = stop_event
+        self.committed = {}
+        self.closed = False
 
-    def __iter__(self):
-        return iter(self._msgs)
+    def poll(self, timeout_ms=0, max_records=None):
+        if not self._polls:
+            self._stop.set()
+            return {}
+        msgs = self._polls.pop(0)
+        if max_records is not None and len(msgs) > max_records:
+            # Records beyond max_records stay buffered for the next poll
+            msgs, rest = msgs[:max_records], msgs[max_records:]
+            self._polls.insert(0, rest)
+        return {TopicPartition("planet_events", 0): msgs} if msgs else {}
 
+    def commit(self, offsets=None):
+        self.committed.update({tp.partition: o.offset for tp, o in offsets.items()})
 
-# -------------------------------------------------------------------
-# ✅ 1) Happy path test
-# -------------------------------------------------------------------
-
+    def assignment(self):
+        return {TopicPartition("planet_events", 0)}
 
-def test_run_consumer_success(mocker):
-    """
-    Tests that `run_consumer`:
-    • Consumes messages.
-    • Creates PlanetEvent entries.
-    • Calls CacheManager increment.
-    """
-    consumer_mod = importlib.import_module("analytics.consumer")
+    def close(self):
+        self.closed = True
 
-    # Patch KafkaConsumer with the in-memory stub
-    mocker.patch.object(consumer_mod, "KafkaConsumer", _DummyKafkaConsumer)
 
-    # Capture calls to PlanetEvent.objects.create
-    created_calls = []
-    consumer_mod.PlanetEvent.objects = types.SimpleNamespace(
-        create=lambda **kw: created_calls.append(kw)
-    )
+def _messages():
+    return [
+        _DummyMsg({"type": "created", "data": {"id": 1}}, _ts_ms(-2), offset=0),
+        _DummyMsg(
+            {"type": "deleted", "data": {"id": 99}}, _ts_ms(-1), "compact", offset=1
+        ),
+        _DummyMsg({"type": "updated", "data": {"id": 1}}, _ts_ms(-1), offset=2),
+    ]
 
-    # Capture calls to CacheManager._incr_event_count_for_day
-    incr_calls = []
-    mocker.patch.object(
-        consumer_mod.CacheManager,
-        "_incr_event_count_for_day",
-        side_effect=lambda d: incr_calls.append(d),
-    )
 
-    # Silence logger during test
-    mocker.patch.object(consumer_mod, "logger")
+# -------------------------------------------------------------------
+# ✅ 1) Happy path
+# -------------------------------------------------------------------
 
-    # Execute
-    consumer_mod.run_consumer()
 
-    # Assertions
-    assert len(created_calls) == 2
-    assert {c["event_type"] for c in created_calls} == {"created", "deleted"}
-    assert len(incr_calls) == 2
-    assert all(len(day) == 10 for day in incr_calls)  # checks 'YYYY-MM-DD'
+@pytest.mark.django_db(transaction=True)
+def test_run_consumer_persists_counts_and_commits(mocker):
+    """
+    Tests that `run_consumer`:
+    • Stores every polled event.
+    • Bumps the daily counters.
+    • Commits the offset after the last stored event.
+    """
+    stop = threading.Event()
+    consumer = _DummyKafkaConsumer([_messages()[:2], _messages()[2:]], stop)
+    incr = mocker.patch("analytics.pipeline.CacheManager.incr_event_counts")
+
+    consumer_mod.run_consumer(consumer, stop)
+
+    assert sorted(PlanetEvent.objects.values_list("event_type", flat=True)) == [
+        "created",
+        "deleted",
+        "updated",
+    ]
+    counts = Counter()
+    for call in incr.call_args_list:
+        counts.update(call.args[0])
+    assert sorted(counts.values()) == [1, 2]
+    assert all(len(day) == 10 for day in counts)  # checks 'YYYY-MM-DD'
+    assert consumer.committed == {0: 3}
+    assert consumer.closed
+
+
+@pytest.mark.django_db
+def test_process_batch_skips_undecodable(mocker):
+    """A message that cannot be decoded is skipped, not fatal."""
+    bad = _DummyMsg({"type": "created"}, _ts_ms(0))
+    bad.value, bad.headers = b"\xff", [("codec", b"json")]
+    incr = mocker.patch.object(consumer_mod.CacheManager, "incr_event_counts")
+    mocker.patch("analytics.pipeline.logger")
+
+    assert consumer_mod.process_batch([bad] + _messages()[:1]) == 1
+    assert sum(incr.call_args[0][0].values()) == 1
 
 
 # -------------------------------------------------------------------
-# 🚨 2) Error path test
+# 🚨 2) Error path
 # -------------------------------------------------------------------
 
 
-def test_run_consumer_error_path(mocker):
+def test_run_consumer_persist_error_is_not_committed(mocker):
     """
-    Tests that `run_consumer` logs an error when PlanetEvent creation fails.
+    Tests that a batch that fails to persist is logged and its offsets are
+    not committed, so it is consumed again after a restart.
     """
-    consumer_mod = importlib.import_module("analytics.consumer")
-
-    # Consumer returning a single message
-    consumer_mod.KafkaConsumer = lambda *a, **k: [_DummyMsg({"type": "X"}, _ts_ms(0))]
-
-    # PlanetEvent.objects.create raises an exception
-    err = RuntimeError("DB down")
-    consumer_mod.PlanetEvent.objects = types.SimpleNamespace(
-        create=lambda **kw: (_ for _ in ()).throw(err)
+    stop = threading.Event()
+    consumer = _DummyKafkaConsumer([_messages()], stop)
+    mocker.patch(
+        "analytics.pipeline.persist_events", side_effect=RuntimeError("DB down")
     )
+    mocked_logger = mocker.patch("analytics.pipeline.logger")
 
-    # Mock logger to capture error logging
-    mocked_logger = mocker.patch.object(consumer_mod, "logger")
-
-    # Patch CacheManager increment
-    mocker.patch.object(consumer_mod.CacheManager, "_incr_event_count_for_day")
-
-    # Execute
-    consumer_mod.run_consumer()
+    consumer_mod.run_consumer(consumer, stop)
 
-    # Assertions
     mocked_logger.error.assert_called()
     assert "Error in consumer loop" in mocked_logger.error.call_args[0][0]
+    assert consumer.committed == {}
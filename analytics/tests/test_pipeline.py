@@ -0,0 +1,202 @@
+# 🧪 test_pipeline.py - Tests for analytics.pipeline
+
+import threading
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from kafka import TopicPartition
+
+from analytics import pipeline as pl
+from analytics.models import PlanetEvent
+from utils.event_codecs import encode_event
+
+TP0 = TopicPartition("planet_events", 0)
+
+
+class _Consumer:
+    """Records pause/resume/commit calls made by the poll thread."""
+
+    def __init__(self):
+        self.paused_parts = set()
+        self.committed = {}
+
+    def assignment(self):
+        return {TP0}
+
+    def pause(self, *parts):
+        self.paused_parts.update(parts)
+
+    def resume(self, *parts):
+        self.paused_parts.difference_update(parts)
+
+    def paused(self):
+        return set(self.paused_parts)
+
+    def commit(self, offsets=None):
+        self.committed.update({tp: o.offset for tp, o in offsets.items()})
+
+
+@pytest.fixture
+def pipeline():
+    return pl.ConsumerPipeline(
+        _Consumer(), threading.Event(), batch_size=10, poll_timeout_ms=10, queue_size=2
+    )
+
+
+# -------------------------------------------------------------------
+# 🚦 Backpressure
+# -------------------------------------------------------------------
+
+
+def test_full_persist_queue_pauses_until_half_drained(pipeline):
+    batch = pl.Batch([], [], {})
+    pipeline.persist_q.put(batch)
+    pipeline.persist_q.put(batch)
+
+    pipeline._apply_backpressure()
+    assert pipeline.paused
+    assert pipeline.consumer.paused() == {TP0}
+
+    pipeline.persist_q.get()
+    pipeline._apply_backpressure()
+    assert not pipeline.paused
+    assert pipeline.consumer.paused() == set()
+
+
+# -------------------------------------------------------------------
+# 💾 Persist stage
+# -------------------------------------------------------------------
+
+
+def test_persist_stage_coalesces_and_commits_after_insert(pipeline, mocker):
+    """Queued batches become one insert; offsets are committed afterwards."""
+    inserts = []
+
+    def fake_persist(events, days):
+        inserts.append(events)
+        return Counter(days)
+
+    mocker.patch.object(pl, "persist_events", side_effect=fake_persist)
+    incr = mocker.patch.object(pl.CacheManager, "incr_event_counts")
+
+    pipeline._inflight = 2
+    pipeline.persist_q.put(pl.Batch(["a"], ["2024-01-01"], {TP0: 1}))
+    pipeline.persist_q.put(pl.Batch(["b"], ["2024-01-01"], {TP0: 2}))
+    thread = threading.Thread(target=pipeline._persist_loop)
+    aggregator = threading.Thread(target=pipeline._aggregate_loop)
+    thread.start()
+    aggregator.start()
+
+    assert pipeline.drain()
+    pipeline.persist_q.put(pl._STOP)
+    thread.join(5)
+    aggregator.join(5)
+
+    assert inserts == [["a", "b"]]
+    incr.assert_called_once_with({"2024-01-01": 2})
+    assert pipeline.consumer.committed == {TP0: 2}
+
+
+def test_persist_failure_retries_until_success(pipeline, mocker):
+    calls = []
+
+    def flaky(events, days):
+        calls.append(events)
+        if len(calls) == 1:
+            raise RuntimeError("DB down")
+        return Counter(days)
+
+    mocker.patch.object(pl, "persist_events", side_effect=flaky)
+    mocker.patch.object(pl, "logger")
+    pipeline.retry_backoff = 0
+
+    assert pipeline._persist_with_retry(pl.Batch(["a"], ["2024-01-01"], {}))
+    assert len(calls) == 2
+
+
+def test_abandoned_batch_blocks_later_commits_on_its_partition(pipeline, mocker):
+    """A fails and is abandoned, B succeeds: offset 2 must not be committed."""
+    calls = []
+
+    def fail_first(events, days):
+        calls.append(events)
+        if len(calls) == 1:
+            raise RuntimeError("DB down")
+        return Counter(days)
+
+    mocker.patch.object(pl, "persist_events", side_effect=fail_first)
+    mocker.patch.object(pl.CacheManager, "incr_event_counts")
+    mocker.patch.object(pl, "logger")
+    pipeline.batch_size = 1
+    pipeline.stop_event.set()
+
+    pipeline.persist_q.put(pl.Batch(["a"], ["2024-01-01"], {TP0: 1}))
+    pipeline.persist_q.put(pl.Batch(["b"], ["2024-01-01"], {TP0: 2}))
+    pipeline.persist_q.put(pl._STOP)
+    pipeline._inflight = 2
+    pipeline._persist_loop()
+    pipeline.commit_done()
+
+    assert len(calls) == 2
+    assert pipeline.consumer.committed == {}
+
+
+def test_commit_skips_partitions_no_longer_assigned(pipeline):
+    """Offsets of a batch finishing after a revoke are not committed."""
+    tp1 = TopicPartition("planet_events", 1)
+    pipeline.done_q.put({TP0: 3, tp1: 7})
+
+    pipeline.commit_done()
+
+    assert pipeline.consumer.committed == {TP0: 3}
+
+
+@pytest.mark.django_db
+def test_persist_events_counts_only_inserted_rows():
+    """Replayed and in-batch duplicate ids are stored once and counted once."""
+    known, fresh = uuid.uuid4(), uuid.uuid4()
+    PlanetEvent.objects.create(event_type="created", data={}, event_id=known)
+
+    events = [
+        PlanetEvent(event_type="created", data={}, event_id=known),
+        PlanetEvent(event_type="created", data={}, event_id=fresh),
+        PlanetEvent(event_type="created", data={}, event_id=fresh),
+        PlanetEvent(event_type="legacy", data={}),
+    ]
+    days = ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03"]
+
+    counts = pl.persist_events(events, days)
+
+    assert counts == Counter({"2024-01-02": 1, "2024-01-03": 1})
+    assert PlanetEvent.objects.filter(event_id=fresh).count() == 1
+    assert PlanetEvent.objects.count() == 3
+    # Replaying the events that carry ids stores and counts nothing
+    assert pl.persist_events(events[:3], days[:3]) == Counter()
+
+
+# -------------------------------------------------------------------
+# 📥 Decode stage
+# -------------------------------------------------------------------
+
+
+def test_decode_messages_reads_event_id():
+    event_id = str(uuid.uuid4())
+    value, headers = encode_event(
+        {"type": "created", "event_id": event_id, "data": {"name": "X"}}
+    )
+    msg = SimpleNamespace(
+        topic="planet_events",
+        partition=0,
+        offset=4,
+        timestamp=0,
+        value=value,
+        headers=headers,
+    )
+
+    batch = pl.decode_messages([msg])
+
+    assert batch.events[0].event_id == uuid.UUID(event_id)
+    assert batch.days == ["1970-01-01"]
+    assert batch.offsets == {TP0: 5}
@@ -0,0 +1,92 @@
+# 🧪 test_supervisor.py - Tests for analytics.supervisor
+
+import signal
+
+import pytest
+
+from analytics import supervisor as sup
+from analytics.consumer import CommitOnRevoke
+
+# -------------------------------------------------------------------
+# 🛠️ Helpers
+# -------------------------------------------------------------------
+
+
+@pytest.fixture
+def fake_spawn(mocker):
+    """Spawn stub handing out increasing fake pids."""
+    mocker.patch.object(sup, "RESTART_BACKOFF", 0)
+    spawned = []
+
+    def spawn(index):
+        spawned.append(index)
+        return 1000 + len(spawned)
+
+    spawn.spawned = spawned
+    return spawn
+
+
+# -------------------------------------------------------------------
+# ✅ Supervision
+# -------------------------------------------------------------------
+
+
+def test_crashed_worker_is_restarted(fake_spawn):
+    s = sup.Supervisor(2, spawn=fake_spawn)
+    s.spawn(0)
+    s.spawn(1)
+
+    s.reap(1002, 256)
+
+    assert fake_spawn.spawned == [0, 1, 1]
+    assert sorted(s.children.values()) == [0, 1]
+
+
+def test_stop_forwards_sigterm_and_does_not_restart(fake_spawn, mocker):
+    kill = mocker.patch.object(sup.os, "kill")
+    s = sup.Supervisor(2, spawn=fake_spawn)
+    s.spawn(0)
+    s.spawn(1)
+
+    s.stop()
+    s.reap(1001, 0)
+
+    assert {c.args for c in kill.call_args_list} == {
+        (1001, signal.SIGTERM),
+        (1002, signal.SIGTERM),
+    }
+    assert fake_spawn.spawned == [0, 1]
+    assert list(s.children) == [1002]
+
+
+def test_resolve_workers_caps_at_partition_count(mocker):
+    mocker.patch.object(sup, "partition_count", return_value=3)
+    mocker.patch.object(sup, "logger")
+
+    assert sup.resolve_workers(8) == 3
+    assert sup.resolve_workers(2) == 2
+
+
+def test_main_single_worker_runs_in_process(mocker):
+    child = mocker.patch.object(sup, "_child_main")
+    supervisor = mocker.patch.object(sup, "Supervisor")
+
+    sup.main(["--workers", "1"])
+
+    child.assert_called_once_with(0)
+    supervisor.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# ⚖️ Rebalance
+# -------------------------------------------------------------------
+
+
+def test_revoke_drains_pipeline(mocker):
+    listener = CommitOnRevoke()
+    listener.pipeline = mocker.Mock()
+
+    listener.on_partitions_revoked([mocker.Mock(partition=0)])
+    listener.on_partitions_revoked([])
+
+    listener.pipeline.drain.assert_called_once_with()
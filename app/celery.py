@@ -3,6 +3,13 @@
 import os
 
 from celery import Celery
+from celery.signals import (
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+
+from utils.kafka_producer import KAFKA_FLUSH_TIMEOUT, close_producer, reset_producer
 
 # 🌱 Set default Django settings for Celery workers
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
@@ -15,3 +22,16 @@ celery_app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # 🔍 Auto-discover tasks across all installed apps
 celery_app.autodiscover_tasks()
+
+
+# 🍴 Kafka producer lifecycle for prefork pools: every pool process builds
+# its own producer, and buffered events are flushed before any worker exits.
+@worker_process_init.connect
+def _reset_kafka_producer(**kwargs):
+    reset_producer()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _flush_kafka_producer(**kwargs):
+    close_producer(timeout=KAFKA_FLUSH_TIMEOUT)
@@ -193,7 +193,38 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TASK_DEFAULT_QUEUE = "default"
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    # 💾 Drain the Kafka event spool (see utils/event_spool.py)
+    "replay-kafka-event-spool": {
+        "task": "planets.tasks.replay_event_spool_task",
+        "schedule": float(os.getenv("KAFKA_SPOOL_REPLAY_INTERVAL", "10")),
+    },
+}
+
+# 📬 Kafka topic provisioning (manage.py kafka_provision_topics)
+KAFKA_PLANET_EVENTS_PARTITIONS = int(os.getenv("KAFKA_PLANET_EVENTS_PARTITIONS", "6"))
+KAFKA_REPLICATION_FACTOR = int(os.getenv("KAFKA_REPLICATION_FACTOR", "1"))
+
+# ⚡ Planet event publishing: "celery" (task per event) or "inprocess"
+# (bounded queue drained by a background thread in the web process).
+# Overflow when the queue is full: "block", "drop" or "celery".
+PLANET_EVENT_PUBLISHER = os.getenv("PLANET_EVENT_PUBLISHER", "celery")
+PLANET_EVENT_QUEUE_SIZE = int(os.getenv("PLANET_EVENT_QUEUE_SIZE", "10000"))
+PLANET_EVENT_QUEUE_OVERFLOW = os.getenv("PLANET_EVENT_QUEUE_OVERFLOW", "celery")
+PLANET_EVENT_QUEUE_BLOCK_TIMEOUT = float(
+    os.getenv("PLANET_EVENT_QUEUE_BLOCK_TIMEOUT", "0.5")
+)
+
+# 🪐 Planet ingestion (comma-separated GraphQL endpoints fetched concurrently)
+PLANET_SOURCE_URLS = [
+    url.strip()
+    for url in os.getenv(
+        "PLANET_SOURCE_URLS", "https://swapi-graphql.netlify.app/graphql"
+    ).split(",")
+    if url.strip()
+]
+PLANET_FETCH_MAX_WORKERS = int(os.getenv("PLANET_FETCH_MAX_WORKERS", "8"))
+PLANET_FETCH_TIMEOUT = float(os.getenv("PLANET_FETCH_TIMEOUT", "10"))
 
 # 🗂️ Default primary key type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,6 +1,7 @@
 # 🗄️ cache_manager.py - CacheManager for caching planets and analytics stats
 
 from django.core.cache import cache
+from django_redis import get_redis_connection
 
 
 class CacheManager:
@@ -26,6 +27,12 @@ class CacheManager:
         key = f"{CacheManager.PLANET_CACHE_PREFIX}{planet_id}"
         cache.delete(key)
 
+    @staticmethod
+    def invalidate_planets_cache(planet_ids):
+        """Remove many planets and the full list from the cache in one call."""
+        keys = [f"{CacheManager.PLANET_CACHE_PREFIX}{pid}" for pid in planet_ids]
+        cache.delete_many(keys + [CacheManager.ALL_PLANETS_CACHE_KEY])
+
     @staticmethod
     def get_all_planets_from_cache():
         """Retrieve all cached planets or None."""
@@ -42,34 +49,93 @@ class CacheManager:
         cache.delete(CacheManager.ALL_PLANETS_CACHE_KEY)
 
     # 📊 Analytics event stats caching
+    #
+    # On Redis the stats are a hash of day -> count updated with HINCRBY, so
+    # concurrent consumers never overwrite each other's increments. The
+    # SEEDED field marks a hash that was filled from the database; a hash
+    # created only by increments (e.g. after expiry) is incomplete and is
+    # reported as a miss so the service reseeds it. Other cache backends
+    # (tests, local dev) keep the same list format under one plain key.
     ANALYTICS_STATS_CACHE_KEY = "analytics:events_stats"
+    ANALYTICS_STATS_HASH_KEY = "analytics:event_counts"
+    ANALYTICS_STATS_SEEDED_FIELD = "_seeded"
+
+    @staticmethod
+    def _redis():
+        """Raw Redis client behind the default cache, or None if not Redis."""
+        try:
+            return get_redis_connection("default")
+        except NotImplementedError:
+            return None
+
+    @staticmethod
+    def _event_stats_hash_key() -> str:
+        return cache.make_key(CacheManager.ANALYTICS_STATS_HASH_KEY)
 
     @staticmethod
     def get_event_stats_from_cache():
-        """Retrieve cached analytics event-stats list or None."""
-        return cache.get(CacheManager.ANALYTICS_STATS_CACHE_KEY)
+        """Retrieve cached analytics event-stats list (sorted by day) or None."""
+        client = CacheManager._redis()
+        if client is None:
+            return cache.get(CacheManager.ANALYTICS_STATS_CACHE_KEY)
+
+        raw = {
+            k.decode(): int(v)
+            for k, v in client.hgetall(CacheManager._event_stats_hash_key()).items()
+        }
+        if raw.pop(CacheManager.ANALYTICS_STATS_SEEDED_FIELD, None) is None:
+            return None
+        return [{"date": d, "count": c} for d, c in sorted(raw.items())]
 
     @staticmethod
     def set_event_stats_in_cache(data: list, timeout: int = 300):
         """Cache analytics event-stats list with optional timeout."""
-        cache.set(CacheManager.ANALYTICS_STATS_CACHE_KEY, data, timeout=timeout)
+        client = CacheManager._redis()
+        if client is None:
+            cache.set(CacheManager.ANALYTICS_STATS_CACHE_KEY, data, timeout=timeout)
+            return
+
+        key = CacheManager._event_stats_hash_key()
+        mapping = {row["date"]: row["count"] for row in data}
+        mapping[CacheManager.ANALYTICS_STATS_SEEDED_FIELD] = 1
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        if timeout is not None:
+            pipe.expire(key, timeout)
+        pipe.execute()
 
     @staticmethod
     def invalidate_event_stats_cache():
         """Remove analytics event-stats cache."""
-        cache.delete(CacheManager.ANALYTICS_STATS_CACHE_KEY)
+        client = CacheManager._redis()
+        if client is None:
+            cache.delete(CacheManager.ANALYTICS_STATS_CACHE_KEY)
+            return
+        client.delete(CacheManager._event_stats_hash_key())
 
     @staticmethod
-    def _incr_event_count_for_day(day_str: str):
+    def incr_event_counts(day_counts: dict):
         """
-        Increment (+1) the event count for a given day.
+        Add a batch of per-day event counts ({'YYYY-MM-DD': n}).
 
-        Keeps the format:
-        [{'date': 'YYYY-MM-DD', 'count': N}, ...]
-        used by get/set_event_stats_in_cache.
+        On Redis this is one pipelined HINCRBY per day: O(1) per event and
+        safe with several consumers.
         """
-        stats = cache.get(CacheManager.ANALYTICS_STATS_CACHE_KEY) or []
-        tmp = {row["date"]: row["count"] for row in stats}
-        tmp[day_str] = tmp.get(day_str, 0) + 1
-        new_stats = [{"date": d, "count": c} for d, c in sorted(tmp.items())]
-        cache.set(CacheManager.ANALYTICS_STATS_CACHE_KEY, new_stats, timeout=None)
+        if not day_counts:
+            return
+        client = CacheManager._redis()
+        if client is None:
+            stats = cache.get(CacheManager.ANALYTICS_STATS_CACHE_KEY) or []
+            tmp = {row["date"]: row["count"] for row in stats}
+            for day_str, count in day_counts.items():
+                tmp[day_str] = tmp.get(day_str, 0) + count
+            new_stats = [{"date": d, "count": c} for d, c in sorted(tmp.items())]
+            cache.set(CacheManager.ANALYTICS_STATS_CACHE_KEY, new_stats, timeout=None)
+            return
+
+        key = CacheManager._event_stats_hash_key()
+        pipe = client.pipeline(transaction=False)
+        for day_str, count in day_counts.items():
+            pipe.hincrby(key, day_str, count)
+        pipe.execute()
@@ -24,6 +24,13 @@ class DummyCache(dict):
     def delete(self, key):
         self.pop(key, None)
 
+    def delete_many(self, keys):
+        for key in keys:
+            self.pop(key, None)
+
+    def make_key(self, key):
+        return key
+
 
 # -------------------------------------------------------------------
 # 🛠️ Fixture: patch cache with DummyCache for all tests
@@ -64,6 +71,21 @@ def test_all_planets_cache_set_get_invalidate():
     assert CacheManager.get_all_planets_from_cache() is None
 
 
+def test_invalidate_planets_cache_many():
+    """Tests invalidating several planets and the full list in one call."""
+    CacheManager.set_planet_in_cache(1, {"id": 1})
+    CacheManager.set_planet_in_cache(2, {"id": 2})
+    CacheManager.set_planet_in_cache(3, {"id": 3})
+    CacheManager.set_all_planets_in_cache([{"id": 1}, {"id": 2}, {"id": 3}])
+
+    CacheManager.invalidate_planets_cache([1, 2])
+
+    assert CacheManager.get_planet_from_cache(1) is None
+    assert CacheManager.get_planet_from_cache(2) is None
+    assert CacheManager.get_planet_from_cache(3) == {"id": 3}
+    assert CacheManager.get_all_planets_from_cache() is None
+
+
 # -------------------------------------------------------------------
 # ✅ Analytics event stats cache tests
 # -------------------------------------------------------------------
@@ -79,21 +101,98 @@ def test_event_stats_cache_set_get_invalidate():
     assert CacheManager.get_event_stats_from_cache() is None
 
 
-def test_incr_event_count_for_day_new_key():
+def test_incr_event_counts_new_key():
     """Tests incrementing count for a day with no existing entry."""
     day = date.today().isoformat()
     CacheManager.invalidate_event_stats_cache()  # ensure clean state
 
-    CacheManager._incr_event_count_for_day(day)
+    CacheManager.incr_event_counts({day: 1})
     assert CacheManager.get_event_stats_from_cache() == [{"date": day, "count": 1}]
 
 
-def test_incr_event_count_for_day_existing_key():
-    """Tests incrementing count for a day with an existing entry."""
-    day = "2025-07-10"
-    CacheManager.set_event_stats_in_cache([{"date": day, "count": 2}])
+def test_incr_event_counts_merges_batch():
+    """Tests adding a batch of per-day counts in one update."""
+    CacheManager.set_event_stats_in_cache([{"date": "2024-01-02", "count": 1}])
+
+    CacheManager.incr_event_counts({"2024-01-02": 2, "2024-01-01": 3})
+
+    assert CacheManager.get_event_stats_from_cache() == [
+        {"date": "2024-01-01", "count": 3},
+        {"date": "2024-01-02", "count": 3},
+    ]
+
+
+# -------------------------------------------------------------------
+# 🧮 Event stats on Redis (hash counters)
+# -------------------------------------------------------------------
+
+
+class DummyRedis:
+    """Implements the hash/pipeline subset CacheManager uses on Redis."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.expiry = {}
+
+    def hgetall(self, key):
+        return {
+            k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()
+        }
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
 
-    CacheManager._incr_event_count_for_day(day)
-    CacheManager._incr_event_count_for_day(day)
+    def hincrby(self, key, field, amount):
+        h = self.hashes.setdefault(key, {})
+        h[field] = h.get(field, 0) + amount
 
-    assert CacheManager.get_event_stats_from_cache() == [{"date": day, "count": 4}]
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+    def pipeline(self, transaction=True):
+        return DummyPipeline(self)
+
+
+class DummyPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def __getattr__(self, name):
+        return lambda *a, **k: self._ops.append((name, a, k))
+
+    def execute(self):
+        return [getattr(self._client, n)(*a, **k) for n, a, k in self._ops]
+
+
+@pytest.fixture
+def redis_client(mocker, _patch_cache):
+    client = DummyRedis()
+    mocker.patch.object(CacheManager, "_redis", return_value=client)
+    return client
+
+
+def test_event_stats_redis_increments_after_seed(redis_client):
+    """Increments land on the seeded hash and are read back sorted."""
+    CacheManager.set_event_stats_in_cache([{"date": "2024-01-02", "count": 5}])
+
+    CacheManager.incr_event_counts({"2024-01-03": 1, "2024-01-02": 2})
+
+    assert CacheManager.get_event_stats_from_cache() == [
+        {"date": "2024-01-02", "count": 7},
+        {"date": "2024-01-03", "count": 1},
+    ]
+    assert redis_client.expiry == {"analytics:event_counts": 300}
+
+
+def test_event_stats_redis_unseeded_hash_is_a_miss(redis_client):
+    """Counters created by increments alone are incomplete: report a miss."""
+    CacheManager.incr_event_counts({"2024-01-02": 2})
+    assert CacheManager.get_event_stats_from_cache() is None
+
+    CacheManager.set_event_stats_in_cache([])
+    CacheManager.invalidate_event_stats_cache()
+    assert CacheManager.get_event_stats_from_cache() is None
@@ -0,0 +1,21 @@
+# 🦄 gunicorn.conf.py - Gunicorn server hooks (loaded from the working directory)
+
+# With --preload the app (and anything it imported) lives in the master
+# before workers fork, so per-process resources are reset in each worker
+# and flushed before the worker exits.
+
+
+def post_fork(server, worker):
+    """🍴 Drop any Kafka producer inherited from the master."""
+    from utils.kafka_producer import reset_producer
+
+    reset_producer()
+
+
+def worker_exit(server, worker):
+    """🛑 Deliver queued and buffered Kafka events before the worker goes away."""
+    from publishers.async_publisher import stop_event_publisher
+    from utils.kafka_producer import KAFKA_FLUSH_TIMEOUT, close_producer
+
+    stop_event_publisher(timeout=KAFKA_FLUSH_TIMEOUT)
+    close_producer(timeout=KAFKA_FLUSH_TIMEOUT)
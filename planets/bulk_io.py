@@ -0,0 +1,252 @@
+# 🪐 bulk_io.py - Streaming NDJSON/CSV readers, writers and COPY helpers
+# used by the planets_import / planets_export management commands
+
+import csv
+import io
+import json
+import os
+
+from django.db import connection, transaction
+
+from planets.models import Planet
+from repositories.planet_repository import PlanetRepository
+
+FORMATS = ("ndjson", "csv")
+FIELDS = ("name", "population", "terrains", "climates")
+
+# -------------------------------------------------------------------
+# 🐘 Postgres COPY statements (staging table merged into planets_planet)
+# -------------------------------------------------------------------
+
+_TABLE = Planet._meta.db_table
+_STAGING_TABLE = f"{_TABLE}_staging"
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE {_STAGING_TABLE} (
+    seq bigserial,
+    name text NOT NULL,
+    population bigint,
+    terrains jsonb NOT NULL,
+    climates jsonb NOT NULL
+) ON COMMIT DROP
+"""
+
+_COPY_IN_SQL = (
+    f"COPY {_STAGING_TABLE} (name, population, terrains, climates) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# DISTINCT ON keeps the last occurrence of each name: ON CONFLICT cannot
+# touch the same target row twice within one statement.
+_MERGE_SQL = f"""
+INSERT INTO {_TABLE} (name, population, terrains, climates, created_at, updated_at)
+SELECT DISTINCT ON (name) name, population, terrains, climates, now(), now()
+FROM {_STAGING_TABLE}
+ORDER BY name, seq DESC
+ON CONFLICT (name) DO UPDATE SET
+    population = EXCLUDED.population,
+    terrains = EXCLUDED.terrains,
+    climates = EXCLUDED.climates,
+    updated_at = EXCLUDED.updated_at
+RETURNING id
+"""
+
+_EXPORT_QUERY = f"SELECT name, population, terrains, climates FROM {_TABLE} ORDER BY id"
+
+_COPY_OUT_SQL = {
+    "csv": f"COPY ({_EXPORT_QUERY}) TO STDOUT WITH (FORMAT csv, HEADER)",
+    # One JSON document per line; control-character quote/delimiter keep
+    # COPY from escaping anything inside the JSON text.
+    "ndjson": (
+        "COPY (SELECT json_build_object('name', name, 'population', population, "
+        "'terrains', terrains, 'climates', climates) "
+        f"FROM {_TABLE} ORDER BY id) "
+        "TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+    ),
+}
+
+
+def supports_copy() -> bool:
+    """True when the default database can use COPY (PostgreSQL only)."""
+    return connection.vendor == "postgresql"
+
+
+def detect_format(path: str, fmt: str = None) -> str:
+    """Return the explicit format or infer it from the file extension."""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return "csv" if ext == ".csv" else "ndjson"
+
+
+# -------------------------------------------------------------------
+# 📥 Readers
+# -------------------------------------------------------------------
+
+
+def _as_list(value) -> list:
+    """Accept a list, a JSON-encoded list (CSV cells) or nothing."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def _as_population(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _normalize_record(raw: dict) -> dict:
+    """Coerce one input row into the fields stored on Planet."""
+    return {
+        "name": raw["name"],
+        "population": _as_population(raw.get("population")),
+        "terrains": _as_list(raw.get("terrains")),
+        "climates": _as_list(raw.get("climates")),
+    }
+
+
+def read_records(fh, fmt: str):
+    """Lazily yield normalized planet records from an NDJSON or CSV stream."""
+    if fmt == "csv":
+        rows = csv.DictReader(fh)
+    else:
+        rows = (json.loads(line) for line in fh if line.strip())
+    for raw in rows:
+        yield _normalize_record(raw)
+
+
+def batched(iterable, size: int):
+    """Yield lists of at most `size` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -------------------------------------------------------------------
+# 📤 Writers
+# -------------------------------------------------------------------
+
+
+def write_records(fh, rows, fmt: str) -> int:
+    """Write (name, population, terrains, climates) tuples; returns row count."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        for name, population, terrains, climates in rows:
+            writer.writerow(
+                [name, population, json.dumps(terrains), json.dumps(climates)]
+            )
+            count += 1
+    else:
+        for row in rows:
+            fh.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+            count += 1
+    return count
+
+
+# -------------------------------------------------------------------
+# 🔄 Import / export paths
+# -------------------------------------------------------------------
+
+
+class _CsvCopyStream(io.TextIOBase):
+    """
+    Read-only text stream that renders records as CSV on demand, so COPY
+    FROM STDIN consumes the input file without buffering it in memory.
+    """
+
+    def __init__(self, records):
+        self._rows = iter(records)
+        self._buffer = ""
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out)
+        self.rows = 0
+
+    def readable(self):
+        return True
+
+    def _next_line(self) -> str:
+        record = next(self._rows, None)
+        if record is None:
+            return ""
+        self._out.seek(0)
+        self._out.truncate()
+        self._writer.writerow(
+            [
+                record["name"],
+                "" if record["population"] is None else record["population"],
+                json.dumps(record["terrains"]),
+                json.dumps(record["climates"]),
+            ]
+        )
+        self.rows += 1
+        return self._out.getvalue()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = self._next_line()
+            if not line:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def copy_import(records) -> tuple:
+    """
+    Stream records into a temporary staging table with COPY FROM STDIN and
+    merge them into planets_planet. Returns (rows read, upserted ids).
+    """
+    stream = _CsvCopyStream(records)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_CREATE_STAGING_SQL)
+        cursor.copy_expert(_COPY_IN_SQL, stream)
+        cursor.execute(_MERGE_SQL)
+        ids = [row[0] for row in cursor.fetchall()]
+    return stream.rows, ids
+
+
+def batched_import(records, batch_size: int) -> tuple:
+    """
+    Portable fallback: upsert records in batches with bulk_create.
+    Returns (rows read, upserted ids).
+    """
+    rows, ids = 0, []
+    for batch in batched(records, batch_size):
+        rows += len(batch)
+        # Last occurrence wins, mirroring the COPY merge
+        unique = list({r["name"]: r for r in batch}.values())
+        with transaction.atomic():
+            planets = PlanetRepository.bulk_upsert(unique, batch_size=batch_size)
+        ids.extend(p.pk for p in planets if p.pk is not None)
+    return rows, ids
+
+
+def copy_export(fh, fmt: str) -> int:
+    """Stream planets_planet to `fh` with COPY TO STDOUT; returns row count."""
+    with connection.cursor() as cursor:
+        cursor.copy_expert(_COPY_OUT_SQL[fmt], fh)
+        return cursor.rowcount
+
+
+def batched_export(fh, fmt: str, batch_size: int) -> int:
+    """Portable fallback: stream rows with a chunked queryset iterator."""
+    rows = (
+        Planet.objects.order_by("id")
+        .values_list(*FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+    return write_records(fh, rows, fmt)
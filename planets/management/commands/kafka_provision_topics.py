@@ -0,0 +1,79 @@
+# 🛰️ kafka_provision_topics.py - Create or grow the planet_events topic
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from kafka import KafkaAdminClient
+from kafka.admin import NewPartitions, NewTopic
+
+from publishers.kafka_publisher import PLANET_EVENTS_TOPIC
+from utils.kafka_producer import KAFKA_BROKER_URL
+
+
+class Command(BaseCommand):
+    """
+    📬 Ensures the planet events topic exists with the requested partition
+    count. Events are keyed by planet id, so consumers in one group can scale
+    up to that many members while keeping per-planet ordering.
+    """
+
+    help = "Create the planet events topic or increase its partition count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--topic", default=PLANET_EVENTS_TOPIC)
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=settings.KAFKA_PLANET_EVENTS_PARTITIONS,
+        )
+        parser.add_argument(
+            "--replication-factor",
+            type=int,
+            default=settings.KAFKA_REPLICATION_FACTOR,
+        )
+
+    def handle(self, *args, **options):
+        topic = options["topic"]
+        partitions = options["partitions"]
+        if partitions < 1:
+            raise CommandError("--partitions must be at least 1")
+
+        admin = KafkaAdminClient(bootstrap_servers=[KAFKA_BROKER_URL])
+        try:
+            if topic not in admin.list_topics():
+                admin.create_topics(
+                    [
+                        NewTopic(
+                            name=topic,
+                            num_partitions=partitions,
+                            replication_factor=options["replication_factor"],
+                        )
+                    ]
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✅ Created topic {topic} with {partitions} partitions"
+                    )
+                )
+                return
+
+            (meta,) = admin.describe_topics([topic])
+            current = len(meta["partitions"])
+            if current == partitions:
+                self.stdout.write(f"✅ Topic {topic} already has {current} partitions")
+            elif current > partitions:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"⚠️ Topic {topic} has {current} partitions; Kafka cannot "
+                        f"reduce it to {partitions}"
+                    )
+                )
+            else:
+                admin.create_partitions({topic: NewPartitions(total_count=partitions)})
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✅ Grew topic {topic} from {current} to {partitions} "
+                        "partitions (existing keys may move to new partitions)"
+                    )
+                )
+        finally:
+            admin.close()
@@ -0,0 +1,64 @@
+# 🪐 planets_import.py - Bulk-load planets from an NDJSON or CSV file
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from cache.cache_manager import CacheManager
+from planets import bulk_io
+from services.planet_service import PlanetService
+
+
+class Command(BaseCommand):
+    """
+    📥 Streams planets from disk into the database. Uses COPY through a
+    staging table on PostgreSQL and batched bulk upserts elsewhere, then
+    invalidates and re-warms the planet caches once.
+    """
+
+    help = "Import planets from an NDJSON or CSV file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file path, or '-' for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=bulk_io.FORMATS,
+            help="Input format (default: inferred from the file extension).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk upsert when COPY is unavailable.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = bulk_io.detect_format(path, options["format"])
+        started = time.perf_counter()
+
+        fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            records = bulk_io.read_records(fh, fmt)
+            if bulk_io.supports_copy():
+                rows, ids = bulk_io.copy_import(records)
+            else:
+                rows, ids = bulk_io.batched_import(records, options["batch_size"])
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+        elapsed = time.perf_counter() - started
+
+        # Single invalidation for every touched planet, then warm the list
+        CacheManager.invalidate_planets_cache(ids)
+        PlanetService.list_all_planets()
+
+        rate = rows / elapsed if elapsed else float(rows)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Imported {rows} planets ({len(ids)} upserted) "
+                f"in {elapsed:.2f}s ({rate:.0f} rows/s)"
+            )
+        )
@@ -1,21 +1,24 @@
 # 🪐 tasks.py - Celery tasks for fetching and publishing Star Wars planet data
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from celery import shared_task
+from django.conf import settings
 from pybreaker import CircuitBreaker, CircuitBreakerError
+from requests.adapters import HTTPAdapter
 
 from publishers.kafka_publisher import KafkaPublisher
-
-from .models import Planet
+from repositories.planet_repository import PlanetRepository
+from utils.kafka_producer import replay_spool
 
 # -------------------------------------------------------------------
-# ⚙️ Logger and circuit breaker setup
+# ⚙️ Logger setup
 # -------------------------------------------------------------------
 
 logger = logging.getLogger(__name__)
-breaker = CircuitBreaker(fail_max=3, reset_timeout=60)
 
 # -------------------------------------------------------------------
 # 🌐 GraphQL API configuration
@@ -35,55 +38,144 @@ query {
 }
 """
 
+# -------------------------------------------------------------------
+# 🔌 Pooled HTTP session and per-source circuit breakers
+# -------------------------------------------------------------------
+
+_session = None
+_breakers = {}
+_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    🪄 Return the process-wide keep-alive session, sized so every fetch
+    worker can hold its own pooled connection.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            pool_size = settings.PLANET_FETCH_MAX_WORKERS
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _get_breaker(url: str) -> CircuitBreaker:
+    """
+    🚦 Return the circuit breaker for a source, so one failing endpoint
+    does not open the circuit for the others.
+    """
+    with _lock:
+        if url not in _breakers:
+            _breakers[url] = CircuitBreaker(fail_max=3, reset_timeout=60)
+        return _breakers[url]
+
+
+# -------------------------------------------------------------------
+# 🛠️ Fetch helpers
+# -------------------------------------------------------------------
+
+
+def _source_request(source) -> tuple:
+    """
+    Resolve a source into (url, GraphQL payload). A source is either an
+    endpoint URL or a dict with "url" and optional "query"/"variables"
+    (e.g. one page of a paginated or sharded endpoint).
+    """
+    if isinstance(source, str):
+        return source, {"query": GRAPHQL_QUERY}
+    payload = {"query": source.get("query", GRAPHQL_QUERY)}
+    if source.get("variables"):
+        payload["variables"] = source["variables"]
+    return source["url"], payload
+
+
+def _post_graphql(url: str, payload: dict) -> list:
+    """POST a GraphQL query and return the planets list from the response."""
+    r = _get_session().post(url, json=payload, timeout=settings.PLANET_FETCH_TIMEOUT)
+    r.raise_for_status()
+    return r.json()["data"]["allPlanets"]["planets"]
+
+
+def _fetch_source(source) -> list:
+    """Fetch one source through its own circuit breaker."""
+    url, payload = _source_request(source)
+    return _get_breaker(url).call(_post_graphql, url, payload)
+
+
+def _normalize_planet(p: dict) -> dict:
+    """Normalize a raw API planet into the fields stored on Planet."""
+    pop_raw = p.get("population")
+    try:
+        population = int(pop_raw)
+    except (ValueError, TypeError):
+        population = None
+
+    return {
+        "name": p["name"],
+        "population": population,
+        "terrains": p.get("terrains") or [],
+        "climates": p.get("climates") or [],
+    }
+
+
 # -------------------------------------------------------------------
 # 🚀 Celery Task: fetch_and_store_planets
 # -------------------------------------------------------------------
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
-def fetch_and_store_planets(self):
+def fetch_and_store_planets(self, sources=None):
     """
-    Fetches all planets from the Star Wars GraphQL API, normalizes the data,
-    and upserts it into the database with observability and retries.
+    Fetches planets from every configured GraphQL source concurrently,
+    merges them by name (later sources win) and bulk-upserts the result.
+    Sources that fail are retried on their own; sources whose circuit is
+    open are skipped.
     """
-    try:
-        r = breaker.call(
-            requests.post,
-            GRAPHQL_URL,
-            json={"query": GRAPHQL_QUERY},
-            timeout=10,
-        )
-        r.raise_for_status()
-        data = r.json()["data"]["allPlanets"]["planets"]
-
-        for p in data:
-            # Normalize population
-            pop_raw = p.get("population")
+    sources = sources or settings.PLANET_SOURCE_URLS
+    merged = {}
+    failed = []
+    last_exc = None
+
+    workers = max(1, min(len(sources), settings.PLANET_FETCH_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fetch_source, source) for source in sources]
+
+        # Iterate in submission order so merge precedence is deterministic
+        for source, future in zip(sources, futures):
             try:
-                population = int(pop_raw)
-            except (ValueError, TypeError):
-                population = None
-
-            terrains = p.get("terrains") or []
-            climates = p.get("climates") or []
-
-            Planet.objects.update_or_create(
-                name=p["name"],
-                defaults={
-                    "population": population,
-                    "terrains": terrains,
-                    "climates": climates,
-                },
-            )
-
-        logger.info("✅ fetch_and_store_planets completed successfully.")
-
-    except CircuitBreakerError:
-        logger.error("❌ Circuit breaker is open; skipping fetch_and_store_planets.")
+                for p in future.result():
+                    planet = _normalize_planet(p)
+                    merged[planet["name"]] = planet
+            except CircuitBreakerError:
+                logger.error(
+                    "❌ Circuit breaker is open; skipping planet source.",
+                    extra={"source": source},
+                )
+            except Exception as exc:
+                logger.error(
+                    f"❌ Error fetching planet source: {exc}",
+                    extra={"source": source},
+                )
+                failed.append(source)
+                last_exc = exc
+
+    try:
+        if merged:
+            PlanetRepository.bulk_upsert(list(merged.values()))
     except Exception as exc:
         logger.error(f"❌ Error in fetch_and_store_planets: {exc}")
         raise self.retry(exc=exc)
 
+    if failed:
+        raise self.retry(exc=last_exc, kwargs={"sources": failed})
+
+    logger.info("✅ fetch_and_store_planets completed successfully.")
+
 
 # -------------------------------------------------------------------
 # 🚀 Celery Task: publish_planet_event_task
@@ -91,9 +183,23 @@ def fetch_and_store_planets(self):
 
 
 @shared_task(ignore_result=True)
-def publish_planet_event_task(event_type: str, data: dict):
+def publish_planet_event_task(event_type: str, data: dict, event_id: str = None):
     """
     Publishes a planet-related event to Kafka asynchronously.
     Executes in a worker, separate from Gunicorn.
     """
-    KafkaPublisher.publish_planet_event(event_type, data)
+    KafkaPublisher.publish_planet_event(event_type, data, event_id=event_id)
+
+
+# -------------------------------------------------------------------
+# 💾 Celery Task: replay_event_spool_task
+# -------------------------------------------------------------------
+
+
+@shared_task(ignore_result=True)
+def replay_event_spool_task():
+    """
+    Re-sends events spooled to disk while Kafka was unreachable.
+    Scheduled by beat; a no-op when the spool is empty or disabled.
+    """
+    replay_spool()
@@ -0,0 +1,136 @@
+# 🪐 test_commands.py - Tests for planets_import / planets_export commands
+
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from planets import bulk_io
+from planets.models import Planet
+
+# -------------------------------------------------------------------
+# 🛠️ Helpers
+# -------------------------------------------------------------------
+
+
+def _write_ndjson(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+
+@pytest.fixture(autouse=True)
+def _patch_cache(mocker):
+    """Keep the cache side effects observable and isolated."""
+    return {
+        "invalidate": mocker.patch(
+            "planets.management.commands.planets_import."
+            "CacheManager.invalidate_planets_cache"
+        ),
+        "warm": mocker.patch(
+            "planets.management.commands.planets_import."
+            "PlanetService.list_all_planets"
+        ),
+    }
+
+
+# -------------------------------------------------------------------
+# ✅ planets_import
+# -------------------------------------------------------------------
+
+
+@pytest.mark.django_db
+def test_import_ndjson_upserts_and_invalidates_once(tmp_path, _patch_cache):
+    """
+    Tests that NDJSON rows are upserted by name (last occurrence wins),
+    and the cache is invalidated and warmed exactly once.
+    """
+    Planet.objects.create(name="Hoth", population=1)
+    src = tmp_path / "planets.ndjson"
+    _write_ndjson(
+        src,
+        [
+            {"name": "Hoth", "population": "2", "terrains": ["tundra"]},
+            {"name": "Naboo", "population": "unknown", "climates": ["temperate"]},
+            {"name": "Hoth", "population": 3},
+        ],
+    )
+    out = io.StringIO()
+
+    call_command("planets_import", str(src), "--batch-size", "2", stdout=out)
+
+    assert Planet.objects.count() == 2
+    hoth = Planet.objects.get(name="Hoth")
+    assert hoth.population == 3
+    naboo = Planet.objects.get(name="Naboo")
+    assert naboo.population is None
+    assert naboo.climates == ["temperate"]
+
+    _patch_cache["invalidate"].assert_called_once()
+    (ids,) = _patch_cache["invalidate"].call_args[0]
+    assert hoth.id in ids and naboo.id in ids
+    _patch_cache["warm"].assert_called_once()
+    assert "rows/s" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_csv(tmp_path):
+    """CSV cells holding JSON lists are decoded into list fields."""
+    src = tmp_path / "planets.csv"
+    with src.open("w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(bulk_io.FIELDS)
+        writer.writerow(["Kamino", "1000000000", '["ocean"]', '["temperate"]'])
+
+    call_command("planets_import", str(src), stdout=io.StringIO())
+
+    kamino = Planet.objects.get(name="Kamino")
+    assert kamino.population == 1000000000
+    assert kamino.terrains == ["ocean"]
+
+
+# -------------------------------------------------------------------
+# ✅ planets_export
+# -------------------------------------------------------------------
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("filename", ["out.ndjson", "out.csv"])
+def test_export_round_trip(tmp_path, filename):
+    """Exported files can be imported back unchanged."""
+    Planet.objects.create(name="Endor", population=30000000, terrains=["forest"])
+    Planet.objects.create(name="Bespin", climates=["temperate"])
+    dst = tmp_path / filename
+
+    call_command("planets_export", str(dst), stdout=io.StringIO())
+    Planet.objects.all().delete()
+    call_command("planets_import", str(dst), stdout=io.StringIO())
+
+    assert list(Planet.objects.order_by("name").values_list(*bulk_io.FIELDS)) == [
+        ("Bespin", None, [], ["temperate"]),
+        ("Endor", 30000000, ["forest"], []),
+    ]
+
+
+# -------------------------------------------------------------------
+# ✅ COPY input stream
+# -------------------------------------------------------------------
+
+
+def test_csv_copy_stream_renders_records_lazily():
+    """The COPY stream yields CSV text in arbitrary read sizes."""
+    records = [
+        {"name": "A, b", "population": None, "terrains": [], "climates": ["x"]},
+        {"name": "C", "population": 5, "terrains": ["y"], "climates": []},
+    ]
+    stream = bulk_io._CsvCopyStream(records)
+
+    text = ""
+    while chunk := stream.read(7):
+        text += chunk
+
+    assert stream.rows == 2
+    assert list(csv.reader(io.StringIO(text))) == [
+        ["A, b", "", "[]", '["x"]'],
+        ["C", "5", '["y"]', "[]"],
+    ]
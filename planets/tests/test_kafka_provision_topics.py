@@ -0,0 +1,90 @@
+# 🛰️ test_kafka_provision_topics.py - Tests for kafka_provision_topics command
+
+import io
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+# -------------------------------------------------------------------
+# 🛠️ Helpers
+# -------------------------------------------------------------------
+
+
+class DummyAdmin:
+    """Mimics KafkaAdminClient for one topic with a given partition count."""
+
+    def __init__(self, partitions=None):
+        self.partitions = partitions
+        self.created = []
+        self.grown = {}
+        self.closed = False
+
+    def list_topics(self):
+        return ["planet_events"] if self.partitions else []
+
+    def describe_topics(self, topics):
+        return [{"topic": topics[0], "partitions": [{}] * self.partitions}]
+
+    def create_topics(self, new_topics):
+        self.created.extend(new_topics)
+
+    def create_partitions(self, topic_partitions):
+        self.grown.update(topic_partitions)
+
+    def close(self):
+        self.closed = True
+
+
+def _run(mocker, admin, *args):
+    mocker.patch(
+        "planets.management.commands.kafka_provision_topics.KafkaAdminClient",
+        return_value=admin,
+    )
+    out = io.StringIO()
+    call_command("kafka_provision_topics", *args, stdout=out)
+    return out.getvalue()
+
+
+# -------------------------------------------------------------------
+# ✅ Tests
+# -------------------------------------------------------------------
+
+
+def test_creates_missing_topic(mocker):
+    """A missing topic is created with the requested partitions."""
+    admin = DummyAdmin()
+
+    _run(mocker, admin, "--partitions", "12", "--replication-factor", "3")
+
+    (topic,) = admin.created
+    assert topic.name == "planet_events"
+    assert topic.num_partitions == 12
+    assert topic.replication_factor == 3
+    assert admin.closed
+
+
+def test_grows_existing_topic(mocker):
+    """An existing topic with fewer partitions is grown to the target."""
+    admin = DummyAdmin(partitions=3)
+
+    _run(mocker, admin, "--partitions", "6")
+
+    assert admin.created == []
+    assert admin.grown["planet_events"].total_count == 6
+
+
+def test_never_shrinks_topic(mocker):
+    """Kafka cannot remove partitions, so the command only warns."""
+    admin = DummyAdmin(partitions=8)
+
+    output = _run(mocker, admin, "--partitions", "4")
+
+    assert admin.grown == {}
+    assert "cannot reduce" in output
+
+
+def test_rejects_invalid_partitions(mocker):
+    """Zero partitions is rejected before contacting Kafka."""
+    with pytest.raises(CommandError):
+        _run(mocker, DummyAdmin(), "--partitions", "0")
@@ -1,8 +1,19 @@
 # 🪐 test_tasks.py - Unit tests for Celery tasks in planets.tasks
 
-from types import SimpleNamespace
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from planets.tasks import fetch_and_store_planets, publish_planet_event_task
+import pytest
+from celery.exceptions import Retry
+from pybreaker import CircuitBreakerError
+
+import planets.tasks as tasks
+from planets.tasks import (
+    fetch_and_store_planets,
+    publish_planet_event_task,
+    replay_event_spool_task,
+)
 
 # -------------------------------------------------------------------
 # 🛠️ Helpers
@@ -14,95 +25,214 @@ def _graphql_payload(planets):
     return {"data": {"allPlanets": {"planets": planets}}}
 
 
+class _StubGraphQLServer:
+    """
+    Local HTTP server answering every POST with a fixed status and body,
+    recording request payloads and the client ports it was called from.
+    """
+
+    def __init__(self, planets=None, status=200):
+        self.requests = []
+        self.client_ports = set()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                stub.requests.append(json.loads(self.rfile.read(length)))
+                stub.client_ports.add(self.client_address[1])
+                body = json.dumps(_graphql_payload(planets or [])).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/graphql"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Yields a factory for stub servers and shuts them all down afterwards."""
+    servers = []
+
+    def _make(planets=None, status=200):
+        server = _StubGraphQLServer(planets, status)
+        servers.append(server)
+        return server
+
+    yield _make
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_http_state(mocker):
+    """Give each test its own pooled session and circuit breakers."""
+    mocker.patch.object(tasks, "_session", None)
+    mocker.patch.object(tasks, "_breakers", {})
+
+
 # -------------------------------------------------------------------
 # ✅ Tests for fetch_and_store_planets
 # -------------------------------------------------------------------
 
 
-def test_fetch_and_store_planets_success(mocker):
+def test_fetch_and_store_planets_success(mocker, stub_server):
     """
     Tests that:
-    - API is called successfully.
-    - Planet.objects.update_or_create is called for each planet.
+    - Every source is fetched.
+    - Planets are normalized, merged and bulk-upserted once.
     - Logs a success message.
     """
-    planets_api = [
-        {
-            "name": "Naboo",
-            "population": "4500000000",
-            "terrains": ["grassy hills", "swamps"],
-            "climates": ["temperate"],
-        },
+    first = stub_server(
+        [
+            {
+                "name": "Naboo",
+                "population": "4500000000",
+                "terrains": ["grassy hills", "swamps"],
+                "climates": ["temperate"],
+            }
+        ]
+    )
+    second = stub_server(
+        [
+            {
+                "name": "Dagobah",
+                "population": "unknown",
+                "terrains": ["swamp", "jungles"],
+                "climates": ["murky"],
+            }
+        ]
+    )
+
+    mocked_upsert = mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
+    mocked_logger = mocker.patch("planets.tasks.logger")
+
+    fetch_and_store_planets.run(sources=[first.url, second.url])
+
+    mocked_upsert.assert_called_once()
+    (records,) = mocked_upsert.call_args[0]
+    assert sorted(records, key=lambda r: r["name"]) == [
         {
             "name": "Dagobah",
-            "population": "unknown",
+            "population": None,
             "terrains": ["swamp", "jungles"],
             "climates": ["murky"],
         },
+        {
+            "name": "Naboo",
+            "population": 4500000000,
+            "terrains": ["grassy hills", "swamps"],
+            "climates": ["temperate"],
+        },
     ]
-
-    # Mock requests.post
-    mocked_resp = mocker.Mock(
-        status_code=200,
-        json=lambda: _graphql_payload(planets_api),
+    mocked_logger.info.assert_called_with(
+        "✅ fetch_and_store_planets completed successfully."
     )
-    mocked_resp.raise_for_status = mocker.Mock()
-    mocker.patch("planets.tasks.requests.post", return_value=mocked_resp)
 
-    # Mock breaker.call to return mocked_resp
-    mocker.patch("planets.tasks.breaker.call", side_effect=lambda *a, **k: mocked_resp)
 
-    # Mock Planet.objects.update_or_create
-    mocked_uoc = mocker.patch("planets.tasks.Planet.objects.update_or_create")
+def test_fetch_and_store_planets_later_source_wins(mocker, stub_server):
+    """Duplicate planet names are merged with the later source taking precedence."""
+    first = stub_server([{"name": "Hoth", "population": "1"}])
+    second = stub_server([{"name": "Hoth", "population": "2"}])
+    mocked_upsert = mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
 
-    # Mock logger
-    mocked_logger = mocker.patch("planets.tasks.logger")
+    fetch_and_store_planets.run(sources=[first.url, second.url])
 
-    # Execute task
-    fetch_and_store_planets.run()
+    (records,) = mocked_upsert.call_args[0]
+    assert records == [
+        {"name": "Hoth", "population": 2, "terrains": [], "climates": []}
+    ]
 
-    # Assertions
-    mocked_resp.raise_for_status.assert_called_once()
-    assert mocked_uoc.call_count == len(planets_api)
-    mocked_uoc.assert_any_call(
-        name="Naboo",
-        defaults={
-            "population": 4500000000,
-            "terrains": ["grassy hills", "swamps"],
-            "climates": ["temperate"],
-        },
-    )
-    mocked_uoc.assert_any_call(
-        name="Dagobah",
-        defaults={
-            "population": None,
-            "terrains": ["swamp", "jungles"],
-            "climates": ["murky"],
-        },
-    )
-    mocked_logger.info.assert_called_with(
-        "✅ fetch_and_store_planets completed successfully."
+
+def test_fetch_and_store_planets_page_sources(mocker, stub_server):
+    """Dict sources send their own query variables, e.g. one page each."""
+    server = stub_server([{"name": "Tatooine", "population": "200000"}])
+    mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
+
+    fetch_and_store_planets.run(
+        sources=[
+            {"url": server.url, "variables": {"after": None}},
+            {"url": server.url, "variables": {"after": "cursor-1"}},
+        ]
     )
 
+    assert sorted(r["variables"]["after"] or "" for r in server.requests) == [
+        "",
+        "cursor-1",
+    ]
+
+
+def test_fetch_reuses_pooled_connection(mocker, stub_server):
+    """Sequential fetches from one source reuse the keep-alive connection."""
+    server = stub_server([{"name": "Endor"}])
+    mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
+
+    fetch_and_store_planets.run(sources=[server.url])
+    fetch_and_store_planets.run(sources=[server.url])
+
+    assert len(server.requests) == 2
+    assert len(server.client_ports) == 1
+
 
-def test_fetch_and_store_planets_circuit_open(mocker):
+def test_fetch_and_store_planets_retries_only_failed_sources(mocker, stub_server):
     """
-    If the circuit breaker raises CircuitBreakerError,
-    the task should not call update_or_create and should log the error.
+    A failing source does not block the healthy one: its planets are
+    upserted and the task is retried with just the failed source.
     """
-    from pybreaker import CircuitBreakerError
+    good = stub_server([{"name": "Kamino", "population": "1000000000"}])
+    bad = stub_server(status=500)
+    mocked_upsert = mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
+    mocked_retry = mocker.patch.object(
+        fetch_and_store_planets, "retry", side_effect=Retry()
+    )
+
+    with pytest.raises(Retry):
+        fetch_and_store_planets.run(sources=[good.url, bad.url])
+
+    (records,) = mocked_upsert.call_args[0]
+    assert [r["name"] for r in records] == ["Kamino"]
+    assert mocked_retry.call_args.kwargs["kwargs"] == {"sources": [bad.url]}
+
 
-    mocker.patch(
-        "planets.tasks.breaker.call",
-        side_effect=CircuitBreakerError("open"),
+def test_fetch_and_store_planets_circuit_open(mocker, stub_server):
+    """
+    If a source's circuit breaker is open, the task should skip it,
+    not upsert anything and log the error.
+    """
+    server = stub_server([{"name": "Naboo"}])
+    tasks._get_breaker(server.url).call = mocker.Mock(
+        side_effect=CircuitBreakerError("open")
     )
-    mocked_uoc = mocker.patch("planets.tasks.Planet.objects.update_or_create")
+    mocked_upsert = mocker.patch("planets.tasks.PlanetRepository.bulk_upsert")
     mocked_logger = mocker.patch("planets.tasks.logger")
 
-    fetch_and_store_planets.run()
+    fetch_and_store_planets.run(sources=[server.url])
 
-    mocked_uoc.assert_not_called()
+    mocked_upsert.assert_not_called()
     mocked_logger.error.assert_called()
+    assert server.requests == []
+
+
+def test_breakers_are_per_source():
+    """Each source URL gets its own circuit breaker instance."""
+    a = tasks._get_breaker("http://a/graphql")
+    b = tasks._get_breaker("http://b/graphql")
+
+    assert a is not b
+    assert tasks._get_breaker("http://a/graphql") is a
 
 
 # -------------------------------------------------------------------
@@ -119,4 +249,13 @@ def test_publish_planet_event_task_invokes_publisher(mocker):
 
     publish_planet_event_task.run(event_type, data)
 
-    mocked_publish.assert_called_once_with(event_type, data)
+    mocked_publish.assert_called_once_with(event_type, data, event_id=None)
+
+
+def test_replay_event_spool_task_replays(mocker):
+    """Test that the beat task drains the Kafka event spool."""
+    mocked_replay = mocker.patch("planets.tasks.replay_spool")
+
+    replay_event_spool_task.run()
+
+    mocked_replay.assert_called_once_with()
@@ -0,0 +1,154 @@
+# ⚡ async_publisher.py - In-process background publisher for Planet events
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from prometheus_client import Counter, Gauge, Histogram
+
+from publishers.kafka_publisher import KafkaPublisher
+from utils.kafka_producer import KAFKA_FLUSH_TIMEOUT
+
+# 🪵 Logger initialization
+logger = logging.getLogger(__name__)
+
+# 📈 Queue metrics
+queue_depth_gauge = Gauge(
+    "planet_event_queue_depth",
+    "Planet events waiting in the in-process publisher queue",
+)
+queue_latency_histogram = Histogram(
+    "planet_event_queue_latency_seconds",
+    "Time from enqueue to hand-off to the Kafka producer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+queue_overflow_counter = Counter(
+    "planet_event_queue_overflow_total",
+    "Planet events that did not fit in the in-process queue",
+    ["action"],
+)
+queue_publish_errors_counter = Counter(
+    "planet_event_queue_publish_errors_total",
+    "Planet events the background thread failed to publish",
+)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP = "drop"
+OVERFLOW_CELERY = "celery"
+
+_STOP = object()
+
+
+class InProcessEventPublisher:
+    """
+    ⚡ Publishes Planet events from the web process without the Celery hop:
+    • Request threads enqueue into a bounded in-memory queue.
+    • One background thread drains it and owns the Kafka producer calls.
+    • When the queue is full, overflow blocks, drops, or falls back to Celery.
+    """
+
+    def __init__(self, maxsize: int, overflow: str, block_timeout: float):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_CELERY):
+            raise ValueError(f"Unknown overflow behaviour '{overflow}'")
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name="planet-event-publisher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, event_type: str, data: dict, event_id: str = None) -> bool:
+        """
+        🚀 Enqueue an event without waiting for Kafka. Returns False when the
+        event was dropped or handed to Celery because the queue was full.
+        """
+        item = (event_type, data, event_id, time.monotonic())
+        try:
+            if self.overflow == OVERFLOW_BLOCK:
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._handle_overflow(event_type, data, event_id)
+            return False
+        queue_depth_gauge.set(self._queue.qsize())
+        return True
+
+    def _handle_overflow(self, event_type: str, data: dict, event_id: str) -> None:
+        if self.overflow == OVERFLOW_CELERY:
+            # Imported lazily: the task module is only needed on overflow
+            from planets.tasks import publish_planet_event_task
+
+            queue_overflow_counter.labels(action="celery").inc()
+            publish_planet_event_task.delay(event_type, data, event_id=event_id)
+            return
+
+        queue_overflow_counter.labels(action="drop").inc()
+        logger.warning(
+            "⚠️ Planet event queue full; event dropped",
+            extra={"event_type": event_type, "data": data},
+        )
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            queue_depth_gauge.set(self._queue.qsize())
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            event_type, data, event_id, enqueued = item
+            queue_latency_histogram.observe(time.monotonic() - enqueued)
+            try:
+                KafkaPublisher.publish_planet_event(event_type, data, event_id=event_id)
+            except Exception:
+                # KafkaPublisher already logged the failure with context
+                queue_publish_errors_counter.inc()
+            finally:
+                self._queue.task_done()
+
+    def stop(self, timeout: float = None) -> None:
+        """🛑 Publish everything already queued, then stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+# 💤 One publisher per process, created on first use (threads do not
+# survive fork, so a publisher inherited from a preloading parent is dead)
+_publisher = None
+_publisher_pid = None
+_lock = threading.Lock()
+
+
+def get_event_publisher() -> InProcessEventPublisher:
+    """🪄 Return this process's in-process publisher, starting it if needed."""
+    global _publisher, _publisher_pid
+    with _lock:
+        if _publisher is None or _publisher_pid != os.getpid():
+            _publisher = InProcessEventPublisher(
+                maxsize=settings.PLANET_EVENT_QUEUE_SIZE,
+                overflow=settings.PLANET_EVENT_QUEUE_OVERFLOW,
+                block_timeout=settings.PLANET_EVENT_QUEUE_BLOCK_TIMEOUT,
+            )
+            _publisher_pid = os.getpid()
+        return _publisher
+
+
+def stop_event_publisher(timeout: float = KAFKA_FLUSH_TIMEOUT) -> None:
+    """🛑 Drain and stop this process's publisher, if one was started."""
+    global _publisher, _publisher_pid
+    with _lock:
+        publisher = _publisher if _publisher_pid == os.getpid() else None
+        _publisher = None
+        _publisher_pid = None
+    if publisher is not None:
+        publisher.stop(timeout)
+
+
+# Registered after the producer's own exit hook, so it runs first: queued
+# events reach the producer before the producer flushes and closes.
+atexit.register(stop_event_publisher)
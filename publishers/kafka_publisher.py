@@ -1,12 +1,16 @@
 # 🌐 kafka_publisher.py - Kafka event publisher for Planet events
 
 import logging
+import uuid
 
 from utils.kafka_producer import publish_event
 
 # 🪵 Logger initialization
 logger = logging.getLogger(__name__)
 
+# 📬 Topic for planet lifecycle events, keyed by planet id
+PLANET_EVENTS_TOPIC = "planet_events"
+
 
 class KafkaPublisher:
     """
@@ -14,31 +18,42 @@ class KafkaPublisher:
     """
 
     @staticmethod
-    def publish_planet_event(event_type: str, data: dict):
+    def publish_planet_event(
+        event_type: str, data: dict, sync: bool = None, event_id: str = None
+    ):
         """
-        🚀 Publishes a Planet event to the 'planet_events' Kafka topic.
+        🚀 Publishes a Planet event to the 'planet_events' Kafka topic, keyed by
+        planet id so every event for one planet stays on one partition, in order.
+        Every event carries an `event_id` (a new UUID unless the caller passes
+        one) that consumers use to drop duplicates; retries must reuse it.
         Logs success and error states with structured metadata for observability.
+        With sync=True, waits for the broker ack and returns its metadata.
         """
         event = {
             "type": event_type,
             "data": data,
+            "event_id": event_id or str(uuid.uuid4()),
         }
         try:
-            publish_event("planet_events", event)
+            metadata = publish_event(
+                PLANET_EVENTS_TOPIC, event, key=data.get("id"), sync=sync
+            )
             logger.info(
                 "✅ Published Planet event to Kafka",
                 extra={
                     "event_type": event_type,
-                    "topic": "planet_events",
+                    "event_id": event["event_id"],
+                    "topic": PLANET_EVENTS_TOPIC,
                     "data": data,
                 },
             )
+            return metadata
         except Exception as e:
             logger.error(
                 "❌ Failed to publish Planet event to Kafka",
                 extra={
                     "event_type": event_type,
-                    "topic": "planet_events",
+                    "topic": PLANET_EVENTS_TOPIC,
                     "data": data,
                     "error": str(e),
                 },
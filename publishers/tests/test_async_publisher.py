@@ -0,0 +1,120 @@
+# ⚡ test_async_publisher.py - Tests for the in-process event publisher
+
+import threading
+
+import pytest
+
+from publishers.async_publisher import InProcessEventPublisher
+
+# -------------------------------------------------------------------
+# 🧩 Helpers
+# -------------------------------------------------------------------
+
+
+@pytest.fixture
+def gate(mocker):
+    """Block the background thread inside publish until the gate is opened."""
+    opened = threading.Event()
+    published = []
+
+    def fake_publish(event_type, data, event_id=None):
+        opened.wait(5)
+        published.append((event_type, data))
+
+    mocker.patch(
+        "publishers.async_publisher.KafkaPublisher.publish_planet_event",
+        side_effect=fake_publish,
+    )
+    opened.published = published
+    return opened
+
+
+# -------------------------------------------------------------------
+# ✅ Publishing
+# -------------------------------------------------------------------
+
+
+def test_submit_publishes_in_order(gate):
+    """Queued events are published by the background thread, in order."""
+    gate.set()
+    publisher = InProcessEventPublisher(10, "drop", 0.1)
+
+    assert publisher.submit("created", {"id": 1})
+    assert publisher.submit("updated", {"id": 1})
+    publisher.stop(timeout=5)
+
+    assert gate.published == [("created", {"id": 1}), ("updated", {"id": 1})]
+
+
+def test_publish_errors_do_not_stop_thread(mocker):
+    """A failing publish is counted and the next event still goes out."""
+    calls = []
+
+    def flaky(event_type, data, event_id=None):
+        calls.append(data["id"])
+        if data["id"] == 1:
+            raise RuntimeError("broker down")
+
+    mocker.patch(
+        "publishers.async_publisher.KafkaPublisher.publish_planet_event",
+        side_effect=flaky,
+    )
+    publisher = InProcessEventPublisher(10, "drop", 0.1)
+    publisher.submit("created", {"id": 1})
+    publisher.submit("created", {"id": 2})
+    publisher.stop(timeout=5)
+
+    assert calls == [1, 2]
+
+
+# -------------------------------------------------------------------
+# 🚧 Overflow behaviours
+# -------------------------------------------------------------------
+
+
+def _fill(publisher):
+    # One item is held by the blocked thread, one sits in the queue
+    publisher.submit("created", {"id": 1})
+    while publisher._queue.qsize():
+        pass
+    publisher.submit("created", {"id": 2})
+
+
+def test_overflow_drop(gate, mocker):
+    publisher = InProcessEventPublisher(1, "drop", 0.1)
+    _fill(publisher)
+    task = mocker.patch("planets.tasks.publish_planet_event_task")
+
+    assert publisher.submit("created", {"id": 3}) is False
+    task.delay.assert_not_called()
+
+    gate.set()
+    publisher.stop(timeout=5)
+    assert [d["id"] for _, d in gate.published] == [1, 2]
+
+
+def test_overflow_falls_back_to_celery(gate, mocker):
+    publisher = InProcessEventPublisher(1, "celery", 0.1)
+    _fill(publisher)
+    task = mocker.patch("planets.tasks.publish_planet_event_task")
+
+    assert publisher.submit("deleted", {"id": 3}) is False
+    task.delay.assert_called_once_with("deleted", {"id": 3}, event_id=None)
+
+    gate.set()
+    publisher.stop(timeout=5)
+
+
+def test_overflow_block_times_out(gate):
+    publisher = InProcessEventPublisher(1, "block", 0.05)
+    _fill(publisher)
+
+    assert publisher.submit("created", {"id": 3}) is False
+
+    gate.set()
+    publisher.stop(timeout=5)
+
+
+def test_unknown_overflow_rejected():
+    with pytest.raises(ValueError):
+        InProcessEventPublisher(1, "explode", 0.1)
@@ -1,15 +1,17 @@
 # 🛰️ test_kafka_publisher.py - Tests for KafkaPublisher
 
+import uuid
+
 import pytest
 
 from publishers.kafka_publisher import KafkaPublisher
 
 
-def _make_event(event_type: str, data: dict) -> dict:
+def _make_event(event_type: str, data: dict, event_id: str) -> dict:
     """
     Utility to generate a structured Kafka event payload.
     """
-    return {"type": event_type, "data": data}
+    return {"type": event_type, "data": data, "event_id": event_id}
 
 
 # -------------------------------------------------------------------
@@ -27,10 +29,10 @@ def test_publish_planet_event_success(mocker):
     mocked_publish = mocker.patch("publishers.kafka_publisher.publish_event")
     mocked_logger = mocker.patch("publishers.kafka_publisher.logger")
 
-    KafkaPublisher.publish_planet_event(event_type, data)
+    KafkaPublisher.publish_planet_event(event_type, data, event_id="evt-1")
 
     mocked_publish.assert_called_once_with(
-        "planet_events", _make_event(event_type, data)
+        "planet_events", _make_event(event_type, data, "evt-1"), key=1, sync=None
     )
 
     mocked_logger.info.assert_called()
@@ -39,6 +41,35 @@ def test_publish_planet_event_success(mocker):
     assert log_kwargs["extra"]["data"] == data
 
 
+def test_publish_planet_event_generates_event_id(mocker):
+    """
+    Should stamp a fresh UUID event_id when the caller does not pass one.
+    """
+    mocked_publish = mocker.patch("publishers.kafka_publisher.publish_event")
+    mocker.patch("publishers.kafka_publisher.logger")
+
+    KafkaPublisher.publish_planet_event("created", {"id": 1})
+    KafkaPublisher.publish_planet_event("created", {"id": 1})
+
+    first, second = (c.args[1]["event_id"] for c in mocked_publish.call_args_list)
+    assert uuid.UUID(first) and first != second
+
+
+def test_publish_planet_event_sync_returns_metadata(mocker):
+    """
+    Should forward sync=True and return the broker acknowledgement.
+    """
+    mocked_publish = mocker.patch(
+        "publishers.kafka_publisher.publish_event", return_value="metadata"
+    )
+    mocker.patch("publishers.kafka_publisher.logger")
+
+    result = KafkaPublisher.publish_planet_event("updated", {"id": 3}, sync=True)
+
+    assert result == "metadata"
+    assert mocked_publish.call_args.kwargs["sync"] is True
+
+
 # -------------------------------------------------------------------
 # ❌ Test: publish_planet_event - failure path
 # -------------------------------------------------------------------
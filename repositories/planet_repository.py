@@ -53,6 +53,31 @@ class PlanetRepository:
         logger.info("✅ Planet created", extra={"planet_id": planet.id})
         return planet
 
+    @staticmethod
+    def bulk_upsert(records: list, batch_size: int = 500):
+        """
+        Insert or update many planets keyed by their unique name using
+        INSERT ... ON CONFLICT (name) DO UPDATE in batches.
+        """
+        logger.info("🛠️ Bulk upserting Planets", extra={"planet_count": len(records)})
+        planets = Planet.objects.bulk_create(
+            [
+                Planet(
+                    name=r["name"],
+                    population=r.get("population"),
+                    climates=r.get("climates", []),
+                    terrains=r.get("terrains", []),
+                )
+                for r in records
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["population", "climates", "terrains", "updated_at"],
+        )
+        logger.info("✅ Planets upserted", extra={"planet_count": len(planets)})
+        return planets
+
     @staticmethod
     def update(planet, data: dict):
         """
@@ -121,3 +121,31 @@ def test_create(mocker):
     assert created.id == 42
     for k, v in data.items():
         assert getattr(created, k) == v
+
+
+# -------------------------------------------------------------------
+# ✅ TEST: bulk_upsert
+# -------------------------------------------------------------------
+
+
+def test_bulk_upsert(mocker):
+    """Should issue a single conflict-aware bulk_create keyed on name."""
+    mocked_planet = mocker.patch("repositories.planet_repository.Planet")
+    mocked_planet.objects.bulk_create.side_effect = lambda objs, **kw: objs
+
+    records = [
+        {"name": "Naboo", "population": 10, "climates": ["temperate"]},
+        {"name": "Hoth", "terrains": ["tundra"]},
+    ]
+
+    result = PlanetRepository.bulk_upsert(records, batch_size=100)
+
+    assert len(result) == 2
+    _, kwargs = mocked_planet.objects.bulk_create.call_args
+    assert kwargs["update_conflicts"] is True
+    assert kwargs["unique_fields"] == ["name"]
+    assert kwargs["batch_size"] == 100
+    assert "updated_at" in kwargs["update_fields"]
+    mocked_planet.assert_any_call(
+        name="Hoth", population=None, climates=[], terrains=["tundra"]
+    )
@@ -1,9 +1,13 @@
 # 🌍 planet_service.py - PlanetService with caching, DB orchestration, Celery events
 
 import logging
+import uuid
+
+from django.conf import settings
 
 from cache.cache_manager import CacheManager
 from planets.tasks import publish_planet_event_task
+from publishers.async_publisher import get_event_publisher
 from repositories.planet_repository import PlanetRepository
 from utils.exceptions import BaseAppException
 
@@ -16,9 +20,22 @@ class PlanetService:
     🚀 Orchestrates CRUD operations for Planet entities using:
     • CacheManager for caching strategies
     • PlanetRepository for DB persistence
-    • Celery for background event publishing
+    • Celery (or the in-process publisher) for background event publishing
     """
 
+    @staticmethod
+    def _publish_event(event_type: str, data: dict):
+        """
+        📨 Hand an event to the publisher selected by PLANET_EVENT_PUBLISHER.
+        The event id is assigned here, once, so task retries and spool replays
+        of the same change carry the same id and are deduplicated downstream.
+        """
+        event_id = str(uuid.uuid4())
+        if settings.PLANET_EVENT_PUBLISHER == "inprocess":
+            get_event_publisher().submit(event_type, data, event_id=event_id)
+        else:
+            publish_planet_event_task.delay(event_type, data, event_id=event_id)
+
     @staticmethod
     def list_all_planets():
         """📜 List all planets with caching, falling back to DB if cache misses."""
@@ -60,8 +77,8 @@ class PlanetService:
         # Invalidate full-list cache
         CacheManager.invalidate_all_planets_cache()
 
-        # Queue event (non-blocking) via Celery
-        publish_planet_event_task.delay(
+        # Queue event (non-blocking)
+        PlanetService._publish_event(
             "created",
             {
                 "id": planet.id,
@@ -145,8 +162,8 @@ class PlanetService:
         CacheManager.invalidate_planet_cache(id_int)
         CacheManager.invalidate_all_planets_cache()
 
-        # Queue update event via Celery
-        publish_planet_event_task.delay(
+        # Queue update event
+        PlanetService._publish_event(
             "updated",
             {
                 "id": updated.id,
@@ -192,8 +209,8 @@ class PlanetService:
         CacheManager.invalidate_planet_cache(id_int)
         CacheManager.invalidate_all_planets_cache()
 
-        # Queue deletion event via Celery
-        publish_planet_event_task.delay("deleted", {"id": id_int})
+        # Queue deletion event
+        PlanetService._publish_event("deleted", {"id": id_int})
         logger.info(
             "✅ Planet deleted (queued event)",
             extra={"planet_id": id_int},
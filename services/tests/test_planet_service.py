@@ -1,5 +1,8 @@
 # 🚀 test_planet_service.py - Unit tests for PlanetService
 
+import uuid
+from unittest.mock import ANY
+
 import pytest
 
 from services.planet_service import PlanetService
@@ -93,7 +96,7 @@ def test_create_planet_ok(mocker):
     assert result["id"] == 7
     assert result["name"] == "Kamino"
     inv_cache.assert_called_once()
-    task.delay.assert_called_once_with("created", result)
+    task.delay.assert_called_once_with("created", result, event_id=ANY)
 
 
 # -------------------------------------------------------------------
@@ -219,7 +222,8 @@ def test_delete_planet_ok(mocker):
     delete_repo.assert_called_once_with(dummy)
     inv_p.assert_called_once_with(1)
     inv_all.assert_called_once()
-    task.delay.assert_called_once_with("deleted", {"id": 1})
+    task.delay.assert_called_once_with("deleted", {"id": 1}, event_id=ANY)
+    assert uuid.UUID(task.delay.call_args.kwargs["event_id"])
     assert res["status"] == "success"
 
 
@@ -232,3 +236,24 @@ def test_delete_planet_not_found(mocker):
 
     with pytest.raises(BaseAppException):
         PlanetService.delete_planet(123)
+
+
+def test_delete_planet_inprocess_publisher(mocker, settings):
+    """Should hand the event to the in-process publisher instead of Celery."""
+    settings.PLANET_EVENT_PUBLISHER = "inprocess"
+    mocker.patch(
+        "services.planet_service.PlanetRepository.get_by_id",
+        return_value=DummyPlanet(),
+    )
+    mocker.patch("services.planet_service.PlanetRepository.delete")
+    mocker.patch("services.planet_service.CacheManager.invalidate_planet_cache")
+    mocker.patch("services.planet_service.CacheManager.invalidate_all_planets_cache")
+    task = mocker.patch("services.planet_service.publish_planet_event_task")
+    publisher = mocker.patch("services.planet_service.get_event_publisher")
+
+    PlanetService.delete_planet(1)
+
+    publisher.return_value.submit.assert_called_once_with(
+        "deleted", {"id": 1}, event_id=ANY
+    )
+    task.delay.assert_not_called()
@@ -0,0 +1,190 @@
+# 📦 event_codecs.py - Pluggable event codecs shared by producer and consumer
+
+import json
+import uuid
+
+import msgpack
+
+# 🏷️ Kafka header naming the codec a message was encoded with. Messages
+# without it predate the registry and are plain JSON.
+CODEC_HEADER = "codec"
+DEFAULT_CODEC = "json"
+
+
+class JsonCodec:
+    """🔤 UTF-8 JSON, the original wire format."""
+
+    name = "json"
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        return json.dumps(event, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def decode(payload: bytes) -> dict:
+        return json.loads(payload.decode("utf-8"))
+
+
+class MsgpackCodec:
+    """📦 MessagePack: same structure as JSON, binary and faster to parse."""
+
+    name = "msgpack"
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        return msgpack.packb(event, use_bin_type=True)
+
+    @staticmethod
+    def decode(payload: bytes) -> dict:
+        return msgpack.unpackb(payload, raw=False)
+
+
+class CompactCodec:
+    """
+    🗜️ Schema-versioned positional encoding on top of MessagePack.
+
+    Known event/data fields are written by position instead of by name,
+    with a bitmask recording which ones were present; event types are
+    written as small integers and UUID event ids as their 16 raw bytes.
+    Anything outside the schema travels in an "extras" map, so producers
+    can add fields before the schema does. Older schema versions remain
+    decodable.
+
+    Layout: [version, event_mask, event_values, data_mask, data_values, extras]
+    """
+
+    name = "compact"
+
+    EVENT_TYPES = ("created", "updated", "deleted")
+    SCHEMAS = {
+        1: {
+            "event": ("type",),
+            "data": ("id", "name", "population", "climates", "terrains"),
+        },
+        2: {
+            "event": ("type", "event_id"),
+            "data": ("id", "name", "population", "climates", "terrains"),
+        },
+    }
+    VERSION = max(SCHEMAS)
+
+    @staticmethod
+    def _pack_fields(source: dict, fields: tuple) -> tuple:
+        mask, values = 0, []
+        for bit, field in enumerate(fields):
+            if field in source:
+                mask |= 1 << bit
+                values.append(source[field])
+        return mask, values
+
+    @staticmethod
+    def _unpack_fields(mask: int, values: list, fields: tuple) -> dict:
+        present = [f for bit, f in enumerate(fields) if mask & (1 << bit)]
+        return dict(zip(present, values))
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        schema = CompactCodec.SCHEMAS[CompactCodec.VERSION]
+        event = dict(event)
+        data = event.pop("data", None)
+
+        if event.get("type") in CompactCodec.EVENT_TYPES:
+            event["type"] = CompactCodec.EVENT_TYPES.index(event["type"])
+        if isinstance(event.get("event_id"), str):
+            try:
+                event["event_id"] = uuid.UUID(event["event_id"]).bytes
+            except ValueError:
+                pass  # not a UUID: sent as the string itself
+
+        event_mask, event_values = CompactCodec._pack_fields(event, schema["event"])
+        extras = {k: v for k, v in event.items() if k not in schema["event"]}
+
+        if isinstance(data, dict):
+            data_mask, data_values = CompactCodec._pack_fields(data, schema["data"])
+            data_extras = {k: v for k, v in data.items() if k not in schema["data"]}
+            if data_extras or not data:
+                extras["data"] = data_extras
+        else:
+            data_mask, data_values = 0, []
+            if data is not None:
+                extras["data"] = data
+
+        return msgpack.packb(
+            [
+                CompactCodec.VERSION,
+                event_mask,
+                event_values,
+                data_mask,
+                data_values,
+                extras or None,
+            ],
+            use_bin_type=True,
+        )
+
+    @staticmethod
+    def decode(payload: bytes) -> dict:
+        version, event_mask, event_values, data_mask, data_values, extras = (
+            msgpack.unpackb(payload, raw=False)
+        )
+        schema = CompactCodec.SCHEMAS.get(version)
+        if schema is None:
+            raise ValueError(f"Unsupported compact event schema version {version}")
+
+        extras = extras or {}
+        event = CompactCodec._unpack_fields(event_mask, event_values, schema["event"])
+        if isinstance(event.get("type"), int):
+            event["type"] = CompactCodec.EVENT_TYPES[event["type"]]
+        if isinstance(event.get("event_id"), bytes):
+            event["event_id"] = str(uuid.UUID(bytes=event["event_id"]))
+
+        data = CompactCodec._unpack_fields(data_mask, data_values, schema["data"])
+        extra_data = extras.pop("data", None)
+        if isinstance(extra_data, dict):
+            data.update(extra_data)
+        elif extra_data is not None:
+            data = extra_data
+
+        event.update(extras)
+        if data_mask or extra_data is not None:
+            event["data"] = data
+        return event
+
+
+# -------------------------------------------------------------------
+# 📚 Registry
+# -------------------------------------------------------------------
+
+_CODECS = {}
+
+
+def register_codec(codec) -> None:
+    """Register a codec (any object with name/encode/decode) by its name."""
+    _CODECS[codec.name] = codec
+
+
+def get_codec(name: str):
+    """Look up a registered codec, raising ValueError for unknown names."""
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown event codec '{name}'") from None
+
+
+for _codec in (JsonCodec, MsgpackCodec, CompactCodec):
+    register_codec(_codec)
+
+
+def encode_event(event: dict, codec_name: str = DEFAULT_CODEC) -> tuple:
+    """Encode an event; returns (payload bytes, Kafka headers)."""
+    codec = get_codec(codec_name)
+    return codec.encode(event), [(CODEC_HEADER, codec.name.encode("ascii"))]
+
+
+def decode_event(payload: bytes, headers=None) -> dict:
+    """Decode a message value using its codec header (JSON when absent)."""
+    name = DEFAULT_CODEC
+    for key, value in headers or ():
+        if key == CODEC_HEADER:
+            name = value.decode("ascii")
+            break
+    return get_codec(name).decode(payload)
@@ -0,0 +1,277 @@
+# 💾 event_spool.py - Disk-backed, segment-based spool for Kafka events
+#
+# When the broker is unreachable, already-encoded events are appended to
+# local segment files and replayed in order once Kafka is back.
+
+import fcntl
+import logging
+import os
+import struct
+import time
+import zlib
+from contextlib import contextmanager
+
+import msgpack
+from prometheus_client import Counter, Gauge
+
+# 🪵 Logger initialization
+logger = logging.getLogger(__name__)
+
+# 📈 Spool metrics
+events_spooled_counter = Counter(
+    "kafka_events_spooled_total",
+    "Events written to the local spool while Kafka was unavailable",
+    ["topic"],
+)
+events_replayed_counter = Counter(
+    "kafka_events_replayed_total",
+    "Spooled events re-sent to Kafka",
+    ["topic"],
+)
+events_spool_rejected_counter = Counter(
+    "kafka_events_spool_rejected_total",
+    "Events refused because the spool reached its size limit",
+)
+spool_bytes_gauge = Gauge(
+    "kafka_spool_bytes",
+    "Bytes currently held in spool segments",
+)
+
+# 🧱 Record framing: 4-byte payload length + 4-byte CRC32, then the payload
+_HEADER = struct.Struct(">II")
+_SEGMENT_SUFFIX = ".seg"
+_SEGMENT_DIGITS = 12
+
+
+class EventSpool:
+    """
+    💾 Append-only spool split into numbered segment files.
+
+    • Writers always append to the highest-numbered segment; a segment is
+      rolled once it reaches `segment_bytes`.
+    • Writes are fsynced in batches: every `fsync_every` records or after
+      `fsync_interval` seconds, whichever comes first.
+    • `max_bytes` caps the whole spool; appends beyond it are rejected.
+    • Replay seals the current segments (new writes go to a fresh one),
+      sends them oldest first and deletes each segment once the broker
+      has acknowledged all of its records. A segment interrupted mid-way
+      is replayed again from its start, so delivery is at-least-once.
+
+    The directory may be shared by several processes: appends and sealing
+    are serialized with flock, and only one process replays at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 512 * 1024 * 1024,
+        fsync_every: int = 100,
+        fsync_interval: float = 0.2,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._fh = None
+        self._fh_name = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # ---------------------------------------------------------------
+    # 🗂️ Segments
+    # ---------------------------------------------------------------
+
+    def _segments(self) -> list:
+        """Segment file names, oldest first."""
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.endswith(_SEGMENT_SUFFIX)
+        )
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _segment_name(number: int) -> str:
+        return f"{number:0{_SEGMENT_DIGITS}d}{_SEGMENT_SUFFIX}"
+
+    def _next_segment(self, segments: list) -> str:
+        last = int(segments[-1][: -len(_SEGMENT_SUFFIX)]) if segments else 0
+        name = self._segment_name(last + 1)
+        open(self._path(name), "ab").close()
+        return name
+
+    def _sizes(self, segments: list) -> dict:
+        sizes = {}
+        for name in segments:
+            try:
+                sizes[name] = os.path.getsize(self._path(name))
+            except FileNotFoundError:
+                # Deleted by a concurrent replay
+                continue
+        return sizes
+
+    @contextmanager
+    def _locked(self, name: str, blocking: bool = True):
+        with open(self._path(name), "a") as lock_fh:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_fh, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    def is_empty(self) -> bool:
+        """True when no segment holds any record."""
+        return not any(self._sizes(self._segments()).values())
+
+    def size(self) -> int:
+        """Total bytes across all segments."""
+        return sum(self._sizes(self._segments()).values())
+
+    # ---------------------------------------------------------------
+    # ✍️ Writing
+    # ---------------------------------------------------------------
+
+    def _open_segment(self, name: str):
+        if self._fh_name != name:
+            self._sync(force=True)
+            if self._fh is not None:
+                self._fh.close()
+            self._fh = open(self._path(name), "ab")
+            self._fh_name = name
+        return self._fh
+
+    def _sync(self, force: bool = False) -> None:
+        if self._fh is None or not self._unsynced:
+            return
+        due = (
+            self._unsynced >= self.fsync_every
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        )
+        if force or due:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def append(self, topic: str, key, value: bytes, headers=None) -> bool:
+        """
+        ✍️ Append one encoded event. Returns False (and counts a rejection)
+        when the spool is full.
+        """
+        payload = msgpack.packb(
+            [topic, key, value, [list(h) for h in headers or ()]],
+            use_bin_type=True,
+        )
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._locked("append.lock"):
+            segments = self._segments()
+            sizes = self._sizes(segments)
+            total = sum(sizes.values())
+            if total + len(record) > self.max_bytes:
+                events_spool_rejected_counter.inc()
+                logger.error(
+                    "❌ Event spool full; event rejected",
+                    extra={"topic": topic, "spool_bytes": total},
+                )
+                return False
+
+            if not segments or sizes.get(segments[-1], 0) >= self.segment_bytes:
+                segments.append(self._next_segment(segments))
+            fh = self._open_segment(segments[-1])
+            fh.write(record)
+            # Other processes read the segment on replay: hand the bytes to
+            # the OS before releasing the lock; fsync stays batched.
+            fh.flush()
+            self._unsynced += 1
+            self._sync()
+
+        events_spooled_counter.labels(topic=topic).inc()
+        spool_bytes_gauge.set(total + len(record))
+        return True
+
+    def close(self) -> None:
+        """🛑 Fsync and close this process's open segment."""
+        self._sync(force=True)
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = None
+        self._fh_name = None
+
+    # ---------------------------------------------------------------
+    # 🔁 Replay
+    # ---------------------------------------------------------------
+
+    def _read_segment(self, name: str):
+        """Yield (topic, key, value, headers) records from one segment."""
+        with open(self._path(name), "rb") as fh:
+            while True:
+                header = fh.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                length, crc = _HEADER.unpack(header)
+                payload = fh.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    # Torn write from a crash: nothing valid follows it
+                    logger.error(
+                        "❌ Corrupt spool record; skipping rest of segment",
+                        extra={"segment": name},
+                    )
+                    return
+                topic, key, value, headers = msgpack.unpackb(payload, raw=False)
+                yield topic, key, value, [tuple(h) for h in headers]
+
+    def replay(self, send, commit) -> int:
+        """
+        🔁 Re-send sealed segments in order.
+
+        `send(topic, key, value, headers)` hands one record to the producer;
+        `commit()` must block until everything sent so far is acknowledged
+        and raise if any of it failed. Returns the number of records
+        replayed; stops at the first failing segment and keeps it.
+        """
+        replayed = 0
+        with self._locked("replay.lock", blocking=False) as acquired:
+            if not acquired:
+                return 0
+
+            with self._locked("append.lock"):
+                segments = self._segments()
+                if not any(self._sizes(segments).values()):
+                    return 0
+                # Seal: every later append lands in a newer segment
+                self._next_segment(segments)
+
+            for name in segments:
+                counts = {}
+                try:
+                    for topic, key, value, headers in self._read_segment(name):
+                        send(topic, key, value, headers)
+                        counts[topic] = counts.get(topic, 0) + 1
+                    commit()
+                except Exception as exc:
+                    logger.warning(
+                        "⚠️ Spool replay interrupted; will retry",
+                        extra={"segment": name, "error": str(exc)},
+                    )
+                    break
+                os.remove(self._path(name))
+                for topic, count in counts.items():
+                    events_replayed_counter.labels(topic=topic).inc(count)
+                replayed += sum(counts.values())
+
+        spool_bytes_gauge.set(self.size())
+        if replayed:
+            logger.info("✅ Replayed spooled events", extra={"events": replayed})
+        return replayed
@@ -1,14 +1,19 @@
 # 🛰️ kafka_producer.py - Kafka event producer with OTEL + Prometheus monitoring
 
-import json
+import atexit
+import importlib
 import logging
 import os
+import threading
 import time
 
 from kafka import KafkaProducer
-from kafka.errors import NoBrokersAvailable
+from kafka.errors import KafkaTimeoutError, NoBrokersAvailable
 from opentelemetry import trace
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
+
+from utils.event_codecs import encode_event
+from utils.event_spool import EventSpool
 
 # 🪵 Logger and tracer setup
 logger = logging.getLogger(__name__)
@@ -21,22 +26,113 @@ events_published_counter = Counter(
     ["topic"],
 )
 
+# 📬 Delivery outcome metrics, fed by the send future callbacks
+events_delivered_counter = Counter(
+    "kafka_events_delivered_total",
+    "Total events acknowledged by the Kafka broker",
+    ["topic"],
+)
+events_failed_counter = Counter(
+    "kafka_events_failed_total",
+    "Total events the Kafka producer failed to deliver",
+    ["topic"],
+)
+send_latency_histogram = Histogram(
+    "kafka_send_latency_seconds",
+    "Time from producer.send() to broker acknowledgement",
+    ["topic"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# 🧺 Buffer depth and shutdown losses for this process's producer
+producer_buffered_gauge = Gauge(
+    "kafka_producer_buffered_events",
+    "Events handed to the producer but not yet acknowledged or failed",
+)
+events_dropped_counter = Counter(
+    "kafka_events_dropped_total",
+    "Buffered events abandoned without delivery",
+    ["reason"],
+)
+
+
+def _env_bool(name: str, default: str = "False") -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes"}
+
+
+def _parse_acks(value: str):
+    """acks is 0, 1 or 'all'."""
+    return value if value == "all" else int(value)
+
+
 # 🌐 Kafka configuration
 KAFKA_BROKER_URL = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
 
+# 🚚 Throughput tuning: batch records for up to linger_ms and compress batches
+KAFKA_PRODUCER_CONFIG = {
+    "linger_ms": int(os.getenv("KAFKA_PRODUCER_LINGER_MS", "10")),
+    "batch_size": int(os.getenv("KAFKA_PRODUCER_BATCH_SIZE", "65536")),
+    "compression_type": os.getenv("KAFKA_PRODUCER_COMPRESSION", "gzip") or None,
+    "acks": _parse_acks(os.getenv("KAFKA_PRODUCER_ACKS", "1")),
+}
+
+# 🧭 Optional custom partitioner as a dotted path to a callable
+# (key_bytes, all_partitions, available_partitions) -> partition. Keyed
+# records default to murmur2 hashing, which keeps one key on one partition.
+KAFKA_PRODUCER_PARTITIONER = os.getenv("KAFKA_PRODUCER_PARTITIONER", "")
+
+# 📦 Wire codec for event values (json, msgpack or compact); consumers pick
+# the matching decoder from the message's codec header
+KAFKA_EVENT_CODEC = os.getenv("KAFKA_EVENT_CODEC", "json")
+
+# 🔒 Opt-in synchronous mode: wait for the broker ack on every publish
+KAFKA_SYNC_PUBLISH = _env_bool("KAFKA_SYNC_PUBLISH")
+KAFKA_SYNC_TIMEOUT = float(os.getenv("KAFKA_SYNC_TIMEOUT", "10"))
+
+# ⏳ How long worker shutdown waits for buffered events to be delivered
+KAFKA_FLUSH_TIMEOUT = float(os.getenv("KAFKA_FLUSH_TIMEOUT", "10"))
+
+# 💾 Local spool used while Kafka is unreachable (disabled when unset).
+# With a spool, bootstrapping fails fast and events are written to disk
+# instead of waiting on the broker; KAFKA_SPOOL_RETRY_INTERVAL is how long
+# publishing keeps spooling before trying the broker again.
+KAFKA_SPOOL_DIR = os.getenv("KAFKA_SPOOL_DIR", "")
+KAFKA_SPOOL_SEGMENT_BYTES = int(os.getenv("KAFKA_SPOOL_SEGMENT_BYTES", "16777216"))
+KAFKA_SPOOL_MAX_BYTES = int(os.getenv("KAFKA_SPOOL_MAX_BYTES", "536870912"))
+KAFKA_SPOOL_FSYNC_EVERY = int(os.getenv("KAFKA_SPOOL_FSYNC_EVERY", "100"))
+KAFKA_SPOOL_FSYNC_INTERVAL = float(os.getenv("KAFKA_SPOOL_FSYNC_INTERVAL", "0.2"))
+KAFKA_SPOOL_RETRY_INTERVAL = float(os.getenv("KAFKA_SPOOL_RETRY_INTERVAL", "5"))
+
+
+def _load_partitioner(path: str):
+    """Import a partitioner callable from 'package.module.attribute'."""
+    module_path, _, attr = path.rpartition(".")
+    return getattr(importlib.import_module(module_path), attr)
+
+
+def _encode_key(key):
+    """Message keys are sent as UTF-8 strings (e.g. a planet id)."""
+    if key is None or isinstance(key, bytes):
+        return key
+    return str(key).encode("utf-8")
+
 
 def _bootstrap_producer(retries: int = 3, delay: int = 2) -> KafkaProducer:
     """
     🔄 Attempt to create a KafkaProducer with retry logic for resilience.
     """
+    config = dict(KAFKA_PRODUCER_CONFIG)
+    if KAFKA_PRODUCER_PARTITIONER:
+        config["partitioner"] = _load_partitioner(KAFKA_PRODUCER_PARTITIONER)
+
     attempt = 0
     while attempt < retries:
         try:
             return KafkaProducer(
                 bootstrap_servers=[KAFKA_BROKER_URL],
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
                 retries=5,
                 retry_backoff_ms=1000,
+                **config,
             )
         except NoBrokersAvailable:
             attempt += 1
@@ -44,42 +140,263 @@ def _bootstrap_producer(retries: int = 3, delay: int = 2) -> KafkaProducer:
                 f"Kafka not available (attempt {attempt}/{retries}) "
                 f"retrying in {delay}s..."
             )
-
-            time.sleep(delay)
+            if attempt < retries:
+                time.sleep(delay)
     raise RuntimeError("Kafka unreachable after several attempts")
 
 
-# 💤 Lazy-initialized producer; do not connect at import time
+# 💾 Spool state: created lazily, plus the time until which the broker is
+# considered down and publishing goes straight to the spool
+_spool = None
+_kafka_down_until = 0.0
+
+
+def _get_spool():
+    """Return the event spool, or None when KAFKA_SPOOL_DIR is not set."""
+    global _spool
+    if _spool is None and KAFKA_SPOOL_DIR:
+        _spool = EventSpool(
+            KAFKA_SPOOL_DIR,
+            segment_bytes=KAFKA_SPOOL_SEGMENT_BYTES,
+            max_bytes=KAFKA_SPOOL_MAX_BYTES,
+            fsync_every=KAFKA_SPOOL_FSYNC_EVERY,
+            fsync_interval=KAFKA_SPOOL_FSYNC_INTERVAL,
+        )
+    return _spool
+
+
+def _mark_kafka_down() -> None:
+    global _kafka_down_until
+    _kafka_down_until = time.monotonic() + KAFKA_SPOOL_RETRY_INTERVAL
+
+
+def _spool_event(spool, topic: str, key, value: bytes, headers) -> None:
+    """Write an encoded event to the spool; raise if the spool is full."""
+    if not spool.append(topic, key, value, headers):
+        raise RuntimeError("Kafka unavailable and the event spool is full")
+    logger.warning("💾 Kafka unavailable; event spooled", extra={"topic": topic})
+
+
+# 💤 Lazy-initialized, per-process producer; do not connect at import time.
+# The owning pid is tracked so a producer inherited through fork (gunicorn
+# --preload, Celery prefork) is never reused: its sockets and I/O thread
+# belong to the parent.
 _producer = None
+_producer_pid = None
+_buffered = 0
+_lock = threading.Lock()
 
 
 def _get_producer() -> KafkaProducer:
     """
-    🪄 Return the singleton Kafka producer, initializing if needed.
+    🪄 Return this process's Kafka producer, initializing if needed.
     """
-    global _producer
-    if _producer is None:
-        _producer = _bootstrap_producer()
-    return _producer
+    global _producer, _producer_pid
+    with _lock:
+        if _producer is None or _producer_pid != os.getpid():
+            # With a spool to fall back on, do not block callers on retries
+            _producer = _bootstrap_producer(retries=1 if KAFKA_SPOOL_DIR else 3)
+            _producer_pid = os.getpid()
+        return _producer
 
 
-def publish_event(topic: str, event: dict) -> None:
+def reset_producer() -> None:
+    """
+    🍴 Post-fork hook: forget a producer inherited from the parent without
+    closing it (closing would flush the parent's buffer from the child).
+    The next publish lazily creates a fresh producer for this process.
+    """
+    global _producer, _producer_pid, _buffered, _lock
+    # The parent may have forked while another thread held the lock
+    _lock = threading.Lock()
+    _producer = None
+    _producer_pid = None
+    _buffered = 0
+    producer_buffered_gauge.set(0)
+
+
+def _track_buffered(delta: int) -> None:
+    global _buffered
+    with _lock:
+        _buffered += delta
+        producer_buffered_gauge.set(_buffered)
+
+
+def flush_producer(timeout: float = None) -> bool:
+    """
+    🚿 Block until buffered events are delivered or `timeout` elapses.
+    Returns False (and counts the leftovers as dropped) on timeout.
+    """
+    producer = _producer
+    if producer is None or _producer_pid != os.getpid():
+        return True
+    timeout = KAFKA_FLUSH_TIMEOUT if timeout is None else timeout
+    try:
+        producer.flush(timeout=timeout)
+        return True
+    except KafkaTimeoutError:
+        pending = _buffered
+        events_dropped_counter.labels(reason="flush_timeout").inc(pending)
+        logger.error(
+            "❌ Kafka flush timed out; buffered events will be dropped",
+            extra={"pending_events": pending, "timeout": timeout},
+        )
+        return False
+
+
+def close_producer(timeout: float = None) -> None:
+    """
+    🛑 Worker-exit hook: flush buffered events, then close this process's
+    producer. Safe to call when no producer was ever created.
+    """
+    global _producer, _producer_pid
+    producer = _producer
+    if producer is None or _producer_pid != os.getpid():
+        return
+    timeout = KAFKA_FLUSH_TIMEOUT if timeout is None else timeout
+    flush_producer(timeout)
+    try:
+        producer.close(timeout=timeout)
+    finally:
+        _producer = None
+        _producer_pid = None
+        if _spool is not None:
+            _spool.close()
+
+
+# Children created with os.fork() never touch the parent's producer, and
+# plain interpreter exits flush what is still buffered.
+os.register_at_fork(after_in_child=reset_producer)
+atexit.register(close_producer)
+
+
+def _on_send_success(topic: str, started: float, record_metadata) -> None:
+    """📬 Broker acknowledged the record: count it and record send latency."""
+    _track_buffered(-1)
+    events_delivered_counter.labels(topic=topic).inc()
+    send_latency_histogram.labels(topic=topic).observe(time.monotonic() - started)
+
+
+def _on_send_error(
+    topic: str, started: float, exc: Exception, record: tuple = None
+) -> None:
+    """
+    🚨 Delivery failed after the producer's own retries. With a spool, the
+    record (key, value, headers) is kept on disk for replay.
+    """
+    _track_buffered(-1)
+    events_failed_counter.labels(topic=topic).inc()
+    logger.error(
+        "❌ Kafka delivery failed",
+        extra={"topic": topic, "error": str(exc)},
+    )
+    spool = _get_spool()
+    if spool is not None and record is not None:
+        _mark_kafka_down()
+        spool.append(topic, *record)
+
+
+def replay_spool() -> int:
+    """
+    🔁 Re-send spooled events in order once Kafka is reachable.
+    Returns the number of events replayed (0 when there is nothing to do
+    or the broker is still down).
+    """
+    global _kafka_down_until
+    spool = _get_spool()
+    if spool is None or spool.is_empty():
+        return 0
+    try:
+        producer = _get_producer()
+    except RuntimeError:
+        _mark_kafka_down()
+        return 0
+
+    futures = []
+
+    def send(topic, key, value, headers):
+        futures.append(producer.send(topic, value=value, key=key, headers=headers))
+
+    def commit():
+        producer.flush(timeout=KAFKA_FLUSH_TIMEOUT)
+        failed = [f for f in futures if f.failed()]
+        futures.clear()
+        if failed:
+            raise failed[0].exception
+
+    replayed = spool.replay(send, commit)
+    if replayed:
+        _kafka_down_until = 0.0
+    return replayed
+
+
+def publish_event(topic: str, event: dict, key=None, sync: bool = None):
     """
     🚀 Publish an event to Kafka with:
+    • An optional message key; records sharing a key land on the same
+      partition and are consumed in order.
+    • The configured wire codec, named in a message header.
     • OTEL tracing for observability.
-    • Prometheus metrics for monitoring.
-    • Fire-and-forget sending for non-blocking publishing.
+    • Prometheus metrics for sends, deliveries, failures and ack latency.
+    • Batched, non-blocking sending by default; pass sync=True (or set
+      KAFKA_SYNC_PUBLISH) to wait for the broker ack and get its
+      RecordMetadata, raising on delivery failure.
+    • With KAFKA_SPOOL_DIR set, events are spooled to disk (returning None)
+      while Kafka is unreachable or earlier spooled events still await
+      replay, so publishing never waits on the broker and order is kept.
     """
+    sync = KAFKA_SYNC_PUBLISH if sync is None else sync
+
     with tracer.start_as_current_span("publish_kafka_event") as span:
         span.set_attribute("messaging.system", "kafka")
         span.set_attribute("messaging.destination", topic)
         span.set_attribute("messaging.message_payload", str(event))
 
-        producer = _get_producer()
-        producer.send(topic, event)
+        value, headers = encode_event(event, KAFKA_EVENT_CODEC)
+        key = _encode_key(key)
+
+        spool = _get_spool()
+        if spool is not None and (
+            time.monotonic() < _kafka_down_until or not spool.is_empty()
+        ):
+            span.set_attribute("messaging.spooled", True)
+            _spool_event(spool, topic, key, value, headers)
+            return None
+
+        try:
+            producer = _get_producer()
+        except RuntimeError:
+            if spool is None:
+                raise
+            _mark_kafka_down()
+            span.set_attribute("messaging.spooled", True)
+            _spool_event(spool, topic, key, value, headers)
+            return None
+
+        started = time.monotonic()
+        _track_buffered(1)
+        try:
+            future = producer.send(topic, value=value, key=key, headers=headers)
+        except KafkaTimeoutError:
+            # Metadata unavailable: the broker went away under a live producer
+            _track_buffered(-1)
+            if spool is None:
+                raise
+            _mark_kafka_down()
+            _spool_event(spool, topic, key, value, headers)
+            return None
+        except Exception:
+            _track_buffered(-1)
+            raise
+        future.add_callback(_on_send_success, topic, started)
+        future.add_errback(_on_send_error, topic, started, record=(key, value, headers))
 
         events_published_counter.labels(topic=topic).inc()
         logger.info(
             "✅ Event published",
             extra={"topic": topic, "event": event},
         )
+
+        if sync:
+            return future.get(timeout=KAFKA_SYNC_TIMEOUT)
+        return None
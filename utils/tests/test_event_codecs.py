@@ -0,0 +1,121 @@
+# 📦 test_event_codecs.py - Unit tests for utils.event_codecs
+
+import json
+
+import msgpack
+import pytest
+
+from utils.event_codecs import (
+    CompactCodec,
+    decode_event,
+    encode_event,
+    get_codec,
+    register_codec,
+)
+
+# ──────────────────────────────────────────────────────────────
+# 🧪 Sample events
+# ──────────────────────────────────────────────────────────────
+
+SNAPSHOT = {
+    "type": "created",
+    "data": {
+        "id": 12,
+        "name": "Tatooine",
+        "population": 200000,
+        "climates": ["arid"],
+        "terrains": ["desert"],
+    },
+}
+
+EVENTS = [
+    SNAPSHOT,
+    {"type": "deleted", "data": {"id": 99}},
+    {"type": "updated", "data": {"id": 1, "name": "Hoth", "moons": 3}},
+    {"type": "renamed", "data": {}, "source": "admin"},
+    {"type": "created"},
+    {**SNAPSHOT, "event_id": "0b5c0a2e-5a7e-4d1f-9a43-2f1f6a0c9e11"},
+    {"type": "deleted", "data": {"id": 3}, "event_id": "not-a-uuid"},
+]
+
+
+# ──────────────────────────────────────────────────────────────
+# ✅ Round trips
+# ──────────────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize("codec", ["json", "msgpack", "compact"])
+@pytest.mark.parametrize("event", EVENTS)
+def test_round_trip(codec, event):
+    """✅ Every codec decodes exactly what it encoded, extras included."""
+    payload, headers = encode_event(event, codec)
+
+    assert headers == [("codec", codec.encode())]
+    assert decode_event(payload, headers) == event
+
+
+def test_legacy_json_without_header():
+    """🕰️ Messages produced before the codec header decode as JSON."""
+    legacy = json.dumps(SNAPSHOT).encode("utf-8")
+
+    assert decode_event(legacy, []) == SNAPSHOT
+    assert decode_event(legacy, None) == SNAPSHOT
+
+
+def test_compact_v1_payload_still_decodes():
+    """🕰️ Events written with schema v1 (no event_id slot) stay readable."""
+    v1 = msgpack.packb([1, 0b1, [0], 0b1, [12], None])
+
+    assert decode_event(v1, [("codec", b"compact")]) == {
+        "type": "created",
+        "data": {"id": 12},
+    }
+
+
+def test_compact_is_smaller_than_json():
+    """🗜️ The compact format drops repeated key names."""
+    compact, _ = encode_event(SNAPSHOT, "compact")
+    as_json, _ = encode_event(SNAPSHOT, "json")
+
+    assert len(compact) < len(as_json) * 0.7
+
+
+# ──────────────────────────────────────────────────────────────
+# 🚨 Errors and registry
+# ──────────────────────────────────────────────────────────────
+
+
+def test_unknown_codec_header_raises():
+    """🚨 An unregistered codec name is rejected, not silently misread."""
+    with pytest.raises(ValueError, match="Unknown event codec"):
+        decode_event(b"...", [("codec", b"avro")])
+
+
+def test_unknown_compact_version_raises():
+    """🚨 Payloads from a newer schema version are rejected explicitly."""
+    future = msgpack.packb([CompactCodec.VERSION + 1, 0, [], 0, [], None])
+
+    with pytest.raises(ValueError, match="schema version"):
+        CompactCodec.decode(future)
+
+
+def test_register_custom_codec():
+    """📚 Codecs can be plugged in by name."""
+
+    class UpperJson:
+        name = "upper-json"
+
+        @staticmethod
+        def encode(event):
+            return json.dumps(event).upper().encode()
+
+        @staticmethod
+        def decode(payload):
+            return json.loads(payload.decode().lower())
+
+    register_codec(UpperJson)
+
+    payload, headers = encode_event({"type": "x"}, "upper-json")
+    assert payload == b'{"TYPE": "X"}'
+    assert decode_event(payload, headers) == {"type": "x"}
+    assert get_codec("upper-json") is UpperJson
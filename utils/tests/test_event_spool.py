@@ -0,0 +1,87 @@
+# 💾 test_event_spool.py - Unit tests for utils.event_spool
+
+import os
+
+import pytest
+
+from utils.event_spool import EventSpool
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return EventSpool(str(tmp_path), segment_bytes=200, max_bytes=10_000)
+
+
+def _collect(spool):
+    sent = []
+    replayed = spool.replay(lambda *record: sent.append(record), lambda: None)
+    return replayed, sent
+
+
+# ──────────────────────────────────────────────────────────────
+# ✅ Append + replay
+# ──────────────────────────────────────────────────────────────
+
+
+def test_replay_returns_records_in_order(spool):
+    """Records come back oldest first, across segment rolls, then vanish."""
+    for i in range(10):
+        assert spool.append(
+            "planet_events", b"%d" % i, b"v%d" % i, [("codec", b"json")]
+        )
+
+    assert len(spool._segments()) > 1
+    replayed, sent = _collect(spool)
+
+    assert replayed == 10
+    assert [r[1] for r in sent] == [b"%d" % i for i in range(10)]
+    assert sent[0] == ("planet_events", b"0", b"v0", [("codec", b"json")])
+    assert spool.is_empty()
+    assert _collect(spool) == (0, [])
+
+
+def test_appends_during_replay_wait_for_next_replay(spool):
+    """Sealing sends new writes to a fresh segment that is not replayed yet."""
+    spool.append("t", None, b"old")
+
+    def send(*record):
+        spool.append("t", None, b"new")
+
+    assert spool.replay(send, lambda: None) == 1
+    assert not spool.is_empty()
+    assert [r[2] for r in _collect(spool)[1]] == [b"new"]
+
+
+def test_failed_commit_keeps_segment(spool):
+    """A segment whose records were not acknowledged is replayed again."""
+    spool.append("t", None, b"a")
+
+    def commit():
+        raise RuntimeError("broker down")
+
+    assert spool.replay(lambda *r: None, commit) == 0
+    assert [r[2] for r in _collect(spool)[1]] == [b"a"]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🚧 Limits and corruption
+# ──────────────────────────────────────────────────────────────
+
+
+def test_append_rejected_when_full(tmp_path):
+    spool = EventSpool(str(tmp_path), max_bytes=100)
+
+    assert spool.append("t", None, b"x" * 40)
+    assert not spool.append("t", None, b"x" * 80)
+    assert spool.size() < 100
+
+
+def test_torn_tail_is_ignored(spool):
+    """A partial record left by a crash stops reading that segment."""
+    spool.append("t", None, b"good")
+    spool.close()
+    path = os.path.join(spool.directory, spool._segments()[-1])
+    with open(path, "ab") as fh:
+        fh.write(b"\x00\x00\x00\x50\x00")
+
+    assert [r[2] for r in _collect(spool)[1]] == [b"good"]
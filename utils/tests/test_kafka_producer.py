@@ -5,20 +5,64 @@ import types
 import pytest
 
 import utils.kafka_producer as kp
+from utils.event_codecs import decode_event
 
 # ──────────────────────────────────────────────────────────────
 # 🧪 Stubs / Dummies for isolation
 # ──────────────────────────────────────────────────────────────
 
 
+class DummyFuture:
+    """📬 Mimics kafka's FutureRecordMetadata with callbacks and get()."""
+
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+        self.get_timeout = None
+        self.exception = None
+
+    def add_callback(self, fn, *args):
+        self.callbacks.append((fn, args))
+        return self
+
+    def add_errback(self, fn, *args, **kwargs):
+        self.errbacks.append((fn, args, kwargs))
+        return self
+
+    def succeed(self, value="metadata"):
+        for fn, args in self.callbacks:
+            fn(*args, value)
+
+    def fail(self, exc):
+        self.exception = exc
+        for fn, args, kwargs in self.errbacks:
+            fn(*args, exc, **kwargs)
+
+    def get(self, timeout=None):
+        self.get_timeout = timeout
+        return "metadata"
+
+    def failed(self):
+        return self.exception is not None
+
+
 class DummyProducer:
     """🛰️ Mimics kafka.KafkaProducer, records sent messages."""
 
-    def __init__(self, *_, **__):
+    def __init__(self, *_, **kwargs):
+        self.config = kwargs
         self.sent = []  # [(topic, value)]
+        self.keys = []
+        self.headers = []
+        self.futures = []
 
-    def send(self, topic, value):
-        self.sent.append((topic, value))
+    def send(self, topic, value, key=None, headers=None):
+        self.sent.append((topic, decode_event(value, headers)))
+        self.keys.append(key)
+        self.headers.append(headers)
+        future = DummyFuture()
+        self.futures.append(future)
+        return future
 
 
 class DummySpan:
@@ -51,6 +95,17 @@ class DummyCounter:
         self.inc_calls.append(self._labels)
 
 
+class DummyHistogram(DummyCounter):
+    """⏱️ Mimics Prometheus Histogram with labels().observe() tracking."""
+
+    def __init__(self):
+        super().__init__()
+        self.observed = []
+
+    def observe(self, value):
+        self.observed.append((self._labels, value))
+
+
 # ──────────────────────────────────────────────────────────────
 # ✅ Tests: publish_event
 # ──────────────────────────────────────────────────────────────
@@ -80,6 +135,74 @@ def test_publish_event_success(mocker):
     assert dummy_span.attrs["messaging.destination"] == "planet_events"
 
 
+def test_publish_event_delivery_callbacks(mocker):
+    """
+    ✅ Ensures broker acks feed the delivered counter and latency
+    histogram, and failures feed the failed counter.
+    """
+    dummy_producer = DummyProducer()
+    delivered, failed = DummyCounter(), DummyCounter()
+    latency = DummyHistogram()
+
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    mocker.patch.object(kp, "events_published_counter", DummyCounter())
+    mocker.patch.object(kp, "events_delivered_counter", delivered)
+    mocker.patch.object(kp, "events_failed_counter", failed)
+    mocker.patch.object(kp, "send_latency_histogram", latency)
+    mocker.patch.object(kp, "logger")
+
+    kp.publish_event("planet_events", {"n": 1})
+    kp.publish_event("planet_events", {"n": 2})
+    ok, boom = dummy_producer.futures
+
+    ok.succeed()
+    boom.fail(RuntimeError("broker gone"))
+
+    assert delivered.inc_calls == [{"topic": "planet_events"}]
+    assert failed.inc_calls == [{"topic": "planet_events"}]
+    assert len(latency.observed) == 1
+    assert latency.observed[0][1] >= 0
+
+
+def test_publish_event_sync_waits_for_ack(mocker):
+    """🔒 sync=True blocks on future.get() and returns the record metadata."""
+    dummy_producer = DummyProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    mocker.patch.object(kp, "events_published_counter", DummyCounter())
+
+    assert kp.publish_event("planet_events", {}) is None
+    assert dummy_producer.futures[0].get_timeout is None
+
+    assert kp.publish_event("planet_events", {}, sync=True) == "metadata"
+    assert dummy_producer.futures[1].get_timeout == kp.KAFKA_SYNC_TIMEOUT
+
+
+def test_publish_event_encodes_key(mocker):
+    """🧭 Keys are sent as UTF-8 bytes; unkeyed events send key=None."""
+    dummy_producer = DummyProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    mocker.patch.object(kp, "events_published_counter", DummyCounter())
+
+    kp.publish_event("planet_events", {"data": {"id": 42}}, key=42)
+    kp.publish_event("planet_events", {})
+
+    assert dummy_producer.keys == [b"42", None]
+
+
+def test_publish_event_uses_configured_codec(mocker):
+    """📦 Values are encoded with KAFKA_EVENT_CODEC, named in a header."""
+    dummy_producer = DummyProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    mocker.patch.object(kp, "events_published_counter", DummyCounter())
+    mocker.patch.object(kp, "KAFKA_EVENT_CODEC", "compact")
+
+    event = {"type": "updated", "data": {"id": 7, "name": "Yavin IV"}}
+    kp.publish_event("planet_events", event, key=7)
+
+    assert dummy_producer.headers == [[("codec", b"compact")]]
+    assert dummy_producer.sent == [("planet_events", event)]
+
+
 # ──────────────────────────────────────────────────────────────
 # ✅ Tests: _bootstrap_producer
 # ──────────────────────────────────────────────────────────────
@@ -92,6 +215,40 @@ def test_bootstrap_producer_success(mocker):
     assert isinstance(prod, DummyProducer)
 
 
+def test_bootstrap_producer_throughput_config(mocker):
+    """✅ Batching, linger, compression and acks settings reach the producer."""
+    mocker.patch("utils.kafka_producer.KafkaProducer", DummyProducer)
+    mocker.patch.dict(
+        kp.KAFKA_PRODUCER_CONFIG,
+        {"linger_ms": 25, "batch_size": 1024, "compression_type": "gzip"},
+    )
+
+    prod = kp._bootstrap_producer(retries=1)
+
+    assert prod.config["linger_ms"] == 25
+    assert prod.config["batch_size"] == 1024
+    assert prod.config["compression_type"] == "gzip"
+    assert "acks" in prod.config
+    assert "partitioner" not in prod.config
+
+
+def test_bootstrap_producer_custom_partitioner(mocker):
+    """🧭 KAFKA_PRODUCER_PARTITIONER is imported and handed to the producer."""
+    mocker.patch("utils.kafka_producer.KafkaProducer", DummyProducer)
+    mocker.patch.object(
+        kp, "KAFKA_PRODUCER_PARTITIONER", "utils.tests.test_kafka_producer.first"
+    )
+
+    prod = kp._bootstrap_producer(retries=1)
+
+    assert prod.config["partitioner"] is first
+
+
+def first(key_bytes, all_partitions, available_partitions):
+    """Test partitioner: always the first partition."""
+    return all_partitions[0]
+
+
 def test_bootstrap_producer_exhausted(mocker):
     """
     🚨 If KafkaProducer keeps raising NoBrokersAvailable after 'retries',
@@ -109,3 +266,182 @@ def test_bootstrap_producer_exhausted(mocker):
 
     with pytest.raises(RuntimeError, match="Kafka unreachable"):
         kp._bootstrap_producer(retries=2, delay=0)
+
+
+# ──────────────────────────────────────────────────────────────
+# ✅ Tests: per-process producer lifecycle
+# ──────────────────────────────────────────────────────────────
+
+
+class ClosableProducer(DummyProducer):
+    """🛰️ DummyProducer that records flush/close calls."""
+
+    def __init__(self, *args, flush_error=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_error = flush_error
+        self.flushed = []
+        self.closed = []
+
+    def flush(self, timeout=None):
+        self.flushed.append(timeout)
+        if self.flush_error:
+            raise self.flush_error
+
+    def close(self, timeout=None):
+        self.closed.append(timeout)
+
+
+@pytest.fixture
+def _clean_producer_state(mocker):
+    """Isolate the module-level producer singleton for each test."""
+    mocker.patch.object(kp, "_producer", None)
+    mocker.patch.object(kp, "_producer_pid", None)
+    mocker.patch.object(kp, "_buffered", 0)
+
+
+def test_get_producer_recreated_after_fork(mocker, _clean_producer_state):
+    """🍴 A producer owned by another pid is replaced, not reused."""
+    mocker.patch.object(kp, "_bootstrap_producer", side_effect=ClosableProducer)
+    parent = kp._get_producer()
+    assert kp._get_producer() is parent
+
+    mocker.patch.object(kp, "_producer_pid", -1)  # as seen from a forked child
+    child = kp._get_producer()
+
+    assert child is not parent
+    assert parent.closed == []
+
+
+def test_reset_producer_forgets_without_closing(_clean_producer_state):
+    """🍴 reset_producer drops the inherited producer but never closes it."""
+    inherited = ClosableProducer()
+    kp._producer = inherited
+    kp._producer_pid = kp.os.getpid()
+
+    kp.reset_producer()
+
+    assert kp._producer is None
+    assert inherited.closed == [] and inherited.flushed == []
+
+
+def test_buffered_gauge_tracks_inflight(mocker, _clean_producer_state):
+    """🧺 Buffered count rises on send and falls on ack or failure."""
+    producer = ClosableProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=producer)
+    mocker.patch.object(kp, "logger")
+
+    kp.publish_event("planet_events", {})
+    kp.publish_event("planet_events", {})
+    assert kp._buffered == 2
+
+    producer.futures[0].succeed()
+    producer.futures[1].fail(RuntimeError("x"))
+    assert kp._buffered == 0
+
+
+def test_close_producer_flushes_then_closes(_clean_producer_state):
+    """🛑 Worker exit flushes with the timeout, then closes the producer."""
+    producer = ClosableProducer()
+    kp._producer = producer
+    kp._producer_pid = kp.os.getpid()
+
+    kp.close_producer(timeout=3)
+
+    assert producer.flushed == [3]
+    assert producer.closed == [3]
+    assert kp._producer is None
+
+
+def test_flush_timeout_counts_dropped(mocker, _clean_producer_state):
+    """🚨 Events still buffered when flush times out are counted as dropped."""
+    producer = ClosableProducer(flush_error=kp.KafkaTimeoutError())
+    kp._producer = producer
+    kp._producer_pid = kp.os.getpid()
+    kp._buffered = 4
+    dropped = DummyCounter()
+    dropped.inc = lambda n=1: dropped.inc_calls.append((dropped._labels, n))
+    mocker.patch.object(kp, "events_dropped_counter", dropped)
+    mocker.patch.object(kp, "logger")
+
+    assert kp.flush_producer(timeout=0) is False
+    assert dropped.inc_calls == [({"reason": "flush_timeout"}, 4)]
+
+
+def test_close_producer_noop_without_producer(_clean_producer_state):
+    """🛑 Closing before anything was published does nothing."""
+    kp.close_producer(timeout=1)
+    assert kp._producer is None
+
+
+# ──────────────────────────────────────────────────────────────
+# 💾 Tests: spooling while Kafka is unavailable
+# ──────────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def spool(tmp_path, mocker):
+    spool = kp.EventSpool(str(tmp_path))
+    mocker.patch.object(kp, "_get_spool", return_value=spool)
+    mocker.patch.object(kp, "_kafka_down_until", 0.0)
+    mocker.patch.object(kp, "events_published_counter", DummyCounter())
+    return spool
+
+
+def test_publish_event_spools_when_kafka_down(mocker, spool):
+    """💾 An unreachable broker spools the event instead of raising."""
+    get_producer = mocker.patch.object(
+        kp, "_get_producer", side_effect=RuntimeError("Kafka unreachable")
+    )
+
+    assert kp.publish_event("planet_events", {"n": 1}, key=1) is None
+    # Within the retry interval the broker is not tried again
+    kp.publish_event("planet_events", {"n": 2}, key=2)
+
+    assert get_producer.call_count == 1
+    assert not spool.is_empty()
+
+
+def test_publish_event_keeps_order_behind_spool(mocker, spool):
+    """💾 While spooled events await replay, new events queue behind them."""
+    dummy_producer = DummyProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    spool.append("planet_events", b"1", b"old", [])
+
+    kp.publish_event("planet_events", {"n": 2}, key=2)
+
+    assert dummy_producer.sent == []
+
+
+def test_failed_delivery_is_spooled(mocker, spool):
+    """💾 Records the producer gave up on are kept for replay."""
+    dummy_producer = DummyProducer()
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    mocker.patch.object(kp, "logger")
+
+    kp.publish_event("planet_events", {"n": 1}, key=1)
+    dummy_producer.futures[0].fail(RuntimeError("broker gone"))
+
+    assert not spool.is_empty()
+
+
+def test_replay_spool_sends_in_order(mocker, spool):
+    """🔁 Spooled events are re-sent in order once the producer is back."""
+    dummy_producer = DummyProducer()
+    dummy_producer.flush = lambda timeout=None: None
+    mocker.patch.object(kp, "_get_producer", side_effect=RuntimeError("down"))
+    for n in range(3):
+        kp.publish_event("planet_events", {"n": n}, key=n)
+
+    mocker.patch.object(kp, "_get_producer", return_value=dummy_producer)
+    assert kp.replay_spool() == 3
+    assert [e["n"] for _, e in dummy_producer.sent] == [0, 1, 2]
+    assert dummy_producer.keys == [b"0", b"1", b"2"]
+    assert spool.is_empty()
+
+
+def test_replay_spool_noop_when_kafka_still_down(mocker, spool):
+    spool.append("planet_events", None, b"{}", [])
+    mocker.patch.object(kp, "_get_producer", side_effect=RuntimeError("down"))
+
+    assert kp.replay_spool() == 0
+    assert not spool.is_empty()